@@ -0,0 +1,189 @@
+# Headless command line interface
+#
+# Usage:
+#   python -m arabic_translation batch in_dir out_dir --src ar --dest en,fr --workers 8
+#   python -m arabic_translation serve --port 8765
+#
+# Every PDF in in_dir is translated into out_dir/<name>_<dest>.pdf. Documents
+# are processed in parallel across a process pool and documents whose
+# outputs already exist are skipped. With --layout the translation is
+# written over the original pages, block by block, instead of as plain text;
+# with --ocr, scanned pages without a text layer are OCRed first, and with
+# --rewrap lines wrapped by the page width are joined before translation.
+#
+# serve runs the translator as a shared local HTTP service (see
+# translation_service.py).
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dedup import DedupIndex
+from job_journal import JobJournal
+from pdf_layout import translate_pdf_layout
+from pipeline import translate_pdf_file
+from translation_engine import (BACKENDS, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND,
+                                create_backend, create_translator)
+from translation_service import DEFAULT_HOST, DEFAULT_JOBS, DEFAULT_PORT, TranslationService
+
+# One translator and journal per worker process, created on first use
+_translator = None
+_journal = None
+
+
+def get_translator(backend_name, rate):
+    global _translator
+    if _translator is None:
+        _translator = create_translator(create_backend(backend_name), requests_per_second=rate)
+    return _translator
+
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = JobJournal()
+    return _journal
+
+
+def output_paths(pdf_path, out_dir, dests):
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    return {dest: os.path.join(out_dir, f"{base_name}_{dest}.pdf") for dest in dests}
+
+
+def translate_document(pdf_path, out_paths, src, backend_name, rate, layout=False, ocr=False,
+                       rewrap=False):
+    start = time.perf_counter()
+    dedup = DedupIndex()
+    translator = get_translator(backend_name, rate)
+    # Pages finished before a crash are taken from the journal on the next run.
+    # Documents are already spread over processes, so pages are read serially.
+    if layout:
+        pages = translate_pdf_layout(pdf_path, out_paths, translator, src,
+                                     journal=get_journal(), dedup=dedup)
+    else:
+        pages = translate_pdf_file(pdf_path, out_paths, translator, src,
+                                   journal=get_journal(), dedup=dedup, extract_workers=1,
+                                   ocr=ocr, rewrap=rewrap)
+    return pages, time.perf_counter() - start, dedup.ratio
+
+
+def find_pdfs(in_dir):
+    return sorted(os.path.join(in_dir, name) for name in os.listdir(in_dir)
+                  if name.lower().endswith('.pdf'))
+
+
+def run_batch(args):
+    dests = [dest.strip() for dest in args.dest.split(',') if dest.strip()]
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    jobs = []
+    skipped = []
+    for pdf_path in find_pdfs(args.in_dir):
+        out_paths = output_paths(pdf_path, args.out_dir, dests)
+        if not args.force and all(os.path.exists(path) for path in out_paths.values()):
+            skipped.append(pdf_path)
+        else:
+            jobs.append((pdf_path, out_paths))
+
+    print(f"{len(jobs)} document(s) to translate, {len(skipped)} already done")
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(translate_document, pdf_path, out_paths, args.src, args.backend,
+                            args.rate, args.layout, args.ocr, args.rewrap):
+                pdf_path
+            for pdf_path, out_paths in jobs
+        }
+        for future in as_completed(futures):
+            pdf_path = futures[future]
+            name = os.path.basename(pdf_path)
+            try:
+                pages, elapsed, dedup_ratio = future.result()
+                results.append((name, 'ok', pages, elapsed, dedup_ratio))
+                print(f"Translated {name}: {pages} page(s) in {elapsed:.2f} s")
+            except Exception as e:
+                results.append((name, 'error', 0, 0.0, 0.0))
+                print(f"Failed {name}: {str(e)}", file=sys.stderr)
+    total_time = time.perf_counter() - start
+
+    # Per-file timing summary; Dedup is the share of segments that reused
+    # the translation of an identical segment
+    print("\nSummary")
+    print(f"{'File':<40} {'Status':<8} {'Pages':>6} {'Seconds':>9} {'Dedup':>7}")
+    for name, status, pages, elapsed, dedup_ratio in sorted(results):
+        print(f"{name:<40} {status:<8} {pages:>6} {elapsed:>9.2f} {dedup_ratio:>7.1%}")
+    for pdf_path in skipped:
+        print(f"{os.path.basename(pdf_path):<40} {'skipped':<8} {'':>6} {'':>9} {'':>7}")
+    print(f"Total: {total_time:.2f} s")
+
+    return 1 if any(result[1] == 'error' for result in results) else 0
+
+
+def run_serve(args):
+    translator = create_translator(create_backend(args.backend), requests_per_second=args.rate,
+                                   max_workers=args.workers)
+    service = TranslationService(translator, journal=JobJournal(), jobs=args.jobs)
+
+    def ready(address):
+        print(f"Serving translations on http://{address[0]}:{address[1]} "
+              f"(backend: {translator.backend.name})")
+
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="arabic_translation",
+                                     description="Smart Historical Documents Translator")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch = subparsers.add_parser('batch', help="Translate every PDF in a directory")
+    batch.add_argument('in_dir')
+    batch.add_argument('out_dir')
+    batch.add_argument('--src', default='ar')
+    batch.add_argument('--dest', default='en', help="Comma-separated target languages")
+    batch.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    batch.add_argument('--backend', choices=BACKENDS, default=None,
+                       help="Translation backend (default: $ARABIC_TRANSLATION_BACKEND or google)")
+    batch.add_argument('--rate', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                       help="Backend requests per second per worker (0 disables the limit)")
+    batch.add_argument('--layout', action='store_true',
+                       help="Keep the original page layout (requires PyMuPDF)")
+    batch.add_argument('--ocr', action='store_true',
+                       help="OCR pages without a text layer (Tesseract, requires PyMuPDF; "
+                            "plain-text output only)")
+    batch.add_argument('--rewrap', action='store_true',
+                       help="Join lines that do not end a sentence before translating "
+                            "(for text wrapped by the page width; plain-text output only)")
+    batch.add_argument('--force', action='store_true', help="Re-translate completed documents")
+    batch.set_defaults(func=run_batch)
+
+    serve = subparsers.add_parser('serve', help="Run a shared local HTTP translation service")
+    serve.add_argument('--host', default=DEFAULT_HOST)
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                       help="Distinct translation jobs run at the same time")
+    serve.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                       help="Backend requests in flight per job")
+    serve.add_argument('--backend', choices=BACKENDS, default=None,
+                       help="Translation backend (default: $ARABIC_TRANSLATION_BACKEND or google)")
+    serve.add_argument('--rate', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                       help="Backend requests per second, shared by all clients (0 disables)")
+    serve.set_defaults(func=run_serve)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# Persistent audio cache for synthesized speech
+#
+# Every speech chunk is stored as an MP3 file named by a hash of
+# (normalized chunk text, lang, TTS engine), so reading a text again or
+# saving it after it was read aloud never calls gTTS twice for the same
+# chunk, and placeholders of the stub engine are never played as speech. Files are
+# written under a temporary name and renamed into place once complete. The
+# least recently used files are evicted once the cache grows past max_bytes;
+# cleanup() also removes partial files left by interrupted syntheses and is
+# meant to be called on exit.
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from translation_cache import normalize_segment
+
+DEFAULT_AUDIO_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "arabic_translation",
+                                       "audio")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+PARTIAL_SUFFIX = ".part"
+
+
+def audio_key(text, lang, engine):
+    raw = "\0".join([normalize_segment(text), lang, engine])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get('ARABIC_TRANSLATION_AUDIO_CACHE',
+                                                     DEFAULT_AUDIO_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> size, least recently used first
+        self.total_bytes = 0
+        self.partial = set()  # temp files handed out and not yet stored
+
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".mp3"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, name[:-len(".mp3")], stat.st_size))
+        for _, key, size in sorted(files):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".mp3")
+
+    def get(self, text, lang, engine):
+        # Returns the path of the cached audio, or None
+        key = audio_key(text, lang, engine)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def temp_path(self):
+        # A unique file in the cache directory to synthesize into
+        fd, path = tempfile.mkstemp(suffix=PARTIAL_SUFFIX, dir=self.directory)
+        os.close(fd)
+        with self.lock:
+            self.partial.add(path)
+        return path
+
+    def put_file(self, text, lang, engine, temp_path):
+        # Moves a complete temp_path into the cache and returns its final path
+        key = audio_key(text, lang, engine)
+        path = self.path(key)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self.lock:
+            self.partial.discard(temp_path)
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.evict()
+        return path
+
+    def evict(self):
+        # Drops least recently used files, never the newest one; files that
+        # cannot be removed (e.g. loaded by the player) are kept for later
+        for key in list(self.entries)[:-1]:
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.unlink(self.path(key))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            self.total_bytes -= self.entries.pop(key)
+
+    def cleanup(self, max_age=3600):
+        # Removes this cache's partial files, partial files of other processes
+        # older than max_age seconds, and trims the cache to max_bytes
+        now = time.time()
+        with self.lock:
+            partial = self.partial
+            self.partial = set()
+        for name in os.listdir(self.directory):
+            if name.endswith(PARTIAL_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    if path in partial or now - os.path.getmtime(path) > max_age:
+                        os.unlink(path)
+                except OSError:
+                    pass
+        with self.lock:
+            self.evict()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self),
+            'bytes': self.total_bytes,
+        }
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                try:
+                    os.unlink(self.path(key))
+                except OSError:
+                    continue
+                self.total_bytes -= self.entries.pop(key)
@@ -0,0 +1,681 @@
+# Offline benchmarks for the translation pipeline
+# Usage: python benchmark.py batching --lines 2000 --latency 0.02
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmark_suite
+import display_shaping
+from benchmark_suite import BUNDLED_PDFS, percentile
+from local_backend import PhraseTableBackend
+from pdf_extract import backend_available, iter_pages, iter_pages_timed
+from segmenter import segment_text
+from translation_cache import TranslationCache
+from translation_engine import MAX_REQUEST_CHARS, BatchTranslator, StubBackend
+from translation_memory import TranslationMemory
+
+
+def sample_lines(count):
+    # Every line is distinct (it carries its number), so batching is measured
+    # rather than deduplication
+    words = ["الوثيقة", "التاريخية", "في", "سنة", "الحكومة", "قرار", "المدينة", "مجلس"]
+    return [" ".join(words[(i + j) % len(words)] for j in range(6 + i % 10)) + f" {i + 1}"
+            for i in range(count)]
+
+
+def bench_batching(args):
+    lines = sample_lines(args.lines)
+
+    # Current per-line loop from TranslationApp.translate_text
+    backend = StubBackend(latency=args.latency)
+    start = time.perf_counter()
+    for line in lines:
+        if line.strip():
+            backend.translate(line, 'ar', 'en')
+    per_line_time = time.perf_counter() - start
+    per_line_requests = backend.requests
+
+    backend = StubBackend(latency=args.latency)
+    engine = BatchTranslator(backend)
+    start = time.perf_counter()
+    engine.translate_lines(lines, 'ar', 'en')
+    batched_time = time.perf_counter() - start
+
+    print(f"Lines: {len(lines)}, simulated latency: {args.latency * 1000:.0f} ms/request")
+    print(f"Per-line loop: {per_line_requests} requests, {per_line_time:.2f} s, "
+          f"{len(lines) / per_line_time:.0f} lines/s")
+    print(f"Batched:       {backend.requests} requests, {batched_time:.2f} s, "
+          f"{len(lines) / batched_time:.0f} lines/s")
+
+
+def bench_cache(args):
+    lines = sample_lines(args.lines)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranslationCache(os.path.join(tmp, "cache.sqlite3"))
+        for run in ("cold", "warm"):
+            backend = StubBackend(latency=args.latency)
+            engine = BatchTranslator(backend, cache=cache)
+            start = time.perf_counter()
+            engine.translate_lines(lines, 'ar', 'en')
+            elapsed = time.perf_counter() - start
+            print(f"{run.capitalize()} run: {backend.requests} requests, {elapsed:.3f} s")
+        print(f"Cache stats: {cache.stats()}")
+        cache.close()
+
+
+def bench_concurrency(args):
+    lines = sample_lines(args.lines)
+    dests = args.dests.split(',')
+    print(f"Lines: {len(lines)}, targets: {dests}, simulated latency: "
+          f"{args.latency * 1000:.0f} ms/request")
+
+    # Sequential baseline: one language after the other, one request at a time
+    backend = StubBackend(latency=args.latency)
+    engine = BatchTranslator(backend)
+    start = time.perf_counter()
+    for dest in dests:
+        engine.translate_lines(lines, 'ar', dest)
+    print(f"Sequential:         {backend.requests} requests, {time.perf_counter() - start:.2f} s")
+
+    backend = StubBackend(latency=args.latency)
+    engine = BatchTranslator(backend, max_workers=args.workers)
+    start = time.perf_counter()
+    engine.translate_many(lines, 'ar', dests)
+    print(f"Concurrent ({args.workers} in flight): {backend.requests} requests, "
+          f"{time.perf_counter() - start:.2f} s")
+
+
+def bundled_pdf_paths():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return [os.path.join(current_dir, name) for name in BUNDLED_PDFS]
+
+
+def bench_segmentation(args):
+    corpora = {}
+    for path in bundled_pdf_paths():
+        corpora[os.path.basename(path)] = "\n".join(text for _, text in iter_pages(path))
+    sentences = [f"هذا نص تاريخي رقم {i} عن الجزائر، كتب في سنة ١٩٥٤ وهو يصف الأحداث. "
+                 for i in range(400)]
+    corpora["one huge line"] = "".join(sentences)
+    corpora["one-word lines"] = "\n".join(word for sentence in sentences[:60]
+                                          for word in sentence.split())
+
+    # Segments are deduplicated and batched by the engine like lines are
+    print(f"{'Corpus':<16} {'Lines':>6} {'Segments':>9} {'Per-line req':>13} "
+          f"{'Batched lines':>14} {'Batched segs':>13} {'Oversized':>10}")
+    for name, text in corpora.items():
+        lines = [line for line in text.split("\n") if line.strip()]
+        segments = segment_text(text)
+
+        line_backend = StubBackend()
+        BatchTranslator(line_backend).translate_lines(lines, 'ar', 'en')
+        segment_backend = StubBackend()
+        BatchTranslator(segment_backend).translate_lines([s.text for s in segments], 'ar', 'en')
+
+        # Lines that alone exceed the backend's request size limit
+        oversized = sum(1 for line in lines if len(line) > MAX_REQUEST_CHARS)
+        print(f"{name:<16} {len(lines):>6} {len(segments):>9} {len(lines):>13} "
+              f"{line_backend.requests:>14} {segment_backend.requests:>13} {oversized:>10}")
+
+
+def make_synthetic_pdf(path, pages):
+    import fitz  # PyMuPDF
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 72), "\n".join(f"Page {i} line {j}: Vita est pulchra et longa."
+                                              for j in range(45)))
+    doc.save(path)
+    doc.close()
+
+
+def bench_extraction(args):
+    paths = bundled_pdf_paths()
+    with tempfile.TemporaryDirectory() as tmp:
+        if backend_available('fitz'):
+            synthetic = os.path.join(tmp, "synthetic.pdf")
+            make_synthetic_pdf(synthetic, args.pages)
+            paths.append(synthetic)
+
+        configs = [('pypdf2', 1), ('fitz', 1), ('fitz', args.workers)]
+        print(f"{'Document':<16} {'Backend':<8} {'Workers':>7} {'Pages':>6} {'Total s':>8} "
+              f"{'Page p50 ms':>12} {'Page max ms':>12}")
+        for path in paths:
+            for backend, workers in configs:
+                if not backend_available(backend):
+                    continue
+                start = time.perf_counter()
+                timings = [seconds for _, _, seconds in iter_pages_timed(path, backend, workers)]
+                elapsed = time.perf_counter() - start
+                timings.sort()
+                print(f"{os.path.basename(path):<16} {backend:<8} {workers:>7} {len(timings):>6} "
+                      f"{elapsed:>8.3f} {timings[len(timings) // 2] * 1000:>12.2f} "
+                      f"{timings[-1] * 1000:>12.2f}")
+
+
+def bench_memory(args):
+    rng = random.Random(1954)
+    letters = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 8)))
+                  for _ in range(20000)]
+
+    def sentence():
+        words = rng.sample(vocabulary, rng.randint(6, 14))
+        words.insert(rng.randrange(len(words)), str(rng.randint(1900, 1970)))
+        return " ".join(words)
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "memory.sqlite3")
+    memory = TranslationMemory(path)
+    sources = [sentence() for _ in range(args.entries)]
+    start = time.perf_counter()
+    for offset in range(0, len(sources), 10000):
+        chunk = sources[offset:offset + 10000]
+        memory.add_many([(source, f"translation {source}") for source in chunk], 'ar', 'en',
+                        'stub')
+    build_time = time.perf_counter() - start
+    memory.close()
+    # Lookups run on a freshly opened memory, as after a restart
+    start = time.perf_counter()
+    memory = TranslationMemory(path)
+    open_time = time.perf_counter() - start
+
+    queries = {}
+    samples = rng.sample(sources, args.queries)
+    queries['exact'] = samples
+    queries['number changed'] = [" ".join(str(rng.randint(1900, 1970)) if word.isdigit() else word
+                                          for word in source.split()) for source in samples]
+    queries['one word changed'] = []
+    for source in samples:
+        words = source.split()
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        queries['one word changed'].append(" ".join(words))
+    queries['unrelated'] = [sentence() for _ in range(args.queries)]
+
+    print(f"Entries: {args.entries}, stored in {build_time:.1f} s, "
+          f"{os.path.getsize(path) / 1e6:.0f} MB on disk, reopened in {open_time * 1000:.1f} ms")
+    print(f"{'Query kind':<18} {'Hit rate':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for kind, texts in queries.items():
+        timings = []
+        hits = 0
+        for text in texts:
+            began = time.perf_counter()
+            match = memory.lookup(text, 'ar', 'en', 'stub')
+            timings.append((time.perf_counter() - began) * 1000)
+            hits += match is not None
+        print(f"{kind:<18} {hits / len(texts):>9.0%} {percentile(timings, 0.5):>8.3f} "
+              f"{percentile(timings, 0.99):>8.3f}")
+    memory.close()
+    tmp.cleanup()
+
+
+def bench_local_backend(args):
+    rng = random.Random(1954)
+    letters = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    words = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(3, 8)))
+                    for _ in range(args.entries)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "ar-en.tsv"), 'w', encoding='utf-8') as f:
+            for i, word in enumerate(words):
+                f.write(f"{word}\tword{i}\n")
+            for i in range(0, len(words) - 1, 10):
+                f.write(f"{words[i]} {words[i + 1]}\tphrase{i}\n")
+
+        lines = [" ".join(rng.choice(words) for _ in range(rng.randint(6, 14)))
+                 for _ in range(args.lines)]
+        backend = PhraseTableBackend(tmp)
+
+        start = time.perf_counter()
+        backend.translate(lines[0], 'ar', 'en')
+        load_time = time.perf_counter() - start
+
+        timings = []
+        for line in lines:
+            began = time.perf_counter()
+            backend.translate(line, 'ar', 'en')
+            timings.append((time.perf_counter() - began) * 1000)
+
+        print(f"Phrase table: {len(words)} words + phrases, first request (load) "
+              f"{load_time * 1000:.0f} ms")
+        print(f"Warm requests: {len(lines)}, p50 {percentile(timings, 0.5):.3f} ms, "
+              f"p99 {percentile(timings, 0.99):.3f} ms, "
+              f"{len(lines) / (sum(timings) / 1000):.0f} lines/s")
+
+
+def bench_shaping(args):
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+
+    # A document with repeated headers/footers, like the bundled PDFs
+    rng = random.Random(1954)
+    letters = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 8))) for _ in range(2000)]
+    lines = []
+    for page in range(args.pages):
+        lines.append("الجمهورية الجزائرية الديمقراطية الشعبية")
+        lines.extend(" ".join(rng.choice(words) for _ in range(rng.randint(6, 14))) + f" {page}"
+                     for _ in range(args.lines_per_page))
+        lines.append(f"العام {1900 + page % 70} ({rng.choice(words)}) [{rng.choice(words)}]")
+        lines.append(f"Page {page + 1}")
+    text = "\n".join(lines)
+
+    start = time.perf_counter()
+    get_display(arabic_reshaper.reshape(text))
+    whole = time.perf_counter() - start
+
+    display_shaping.clear_cache()
+    start = time.perf_counter()
+    display_shaping.shape_for_display(text)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    display_shaping.shape_for_display(text)
+    warm = time.perf_counter() - start
+
+    print(f"Document: {len(lines)} lines, {len(text)} chars")
+    print(f"{'Method':<28} {'Time ms':>9}")
+    print(f"{'whole document':<28} {whole * 1000:>9.1f}")
+    print(f"{'per line, cold':<28} {cold * 1000:>9.1f}")
+    print(f"{'per line, memoized':<28} {warm * 1000:>9.1f}")
+
+    # The compiled get_display does not mirror brackets; compare its output,
+    # bidi.algorithm's and ours line by line
+    try:
+        from bidi import get_display as compiled_display
+    except ImportError:
+        return
+    display_shaping.clear_cache()
+    reshaped = [arabic_reshaper.reshape(line) for line in lines]
+    outputs = {}
+    for name, func in (('bidi.algorithm', get_display), ('compiled', compiled_display),
+                       ('display_shaping+reshape', lambda line: display_shaping.shape_lines([line])[0])):
+        source = lines if name == 'display_shaping+reshape' else reshaped
+        start = time.perf_counter()
+        outputs[name] = [func(line) for line in source]
+        outputs[name + ' time'] = time.perf_counter() - start
+    print(f"\n{'Per-line output':<28} {'Time ms':>9} {'Differs from bidi.algorithm':>28}")
+    for name in ('bidi.algorithm', 'compiled', 'display_shaping+reshape'):
+        differs = sum(a != b for a, b in zip(outputs[name], outputs['bidi.algorithm']))
+        print(f"{name:<28} {outputs[name + ' time'] * 1000:>9.1f} {differs:>28}")
+
+
+def bench_pdf_export(args):
+    from reportlab.pdfgen import canvas
+
+    from pdf_export import PdfTextWriter
+
+    rng = random.Random(1954)
+    letters = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    arabic_words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 8)))
+                    for _ in range(2000)]
+    latin_words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+                   for _ in range(2000)]
+    documents = {
+        'latin': [" ".join(rng.choice(latin_words) for _ in range(rng.randint(5, 30)))
+                  for _ in range(args.lines)],
+        'arabic': [" ".join(rng.choice(arabic_words) for _ in range(rng.randint(5, 30)))
+                   for _ in range(args.lines)],
+    }
+
+    print(f"{'Document':<10} {'Writer':<32} {'Time s':>8} {'Pages':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, lines in documents.items():
+            # The previous writer: one drawString per line, no wrapping
+            path = os.path.join(tmp, f"{name}-drawstring.pdf")
+            start = time.perf_counter()
+            pdf = canvas.Canvas(path)
+            pdf.setFont("Helvetica", 12)
+            y = pdf._pagesize[1] - 50
+            pages = 1
+            for line in lines:
+                pdf.drawString(50, y, line)
+                y -= 15
+                if y < 50:
+                    pdf.showPage()
+                    pdf.setFont("Helvetica", 12)
+                    y = pdf._pagesize[1] - 50
+                    pages += 1
+            pdf.save()
+            print(f"{name:<10} {'drawString per line (no wrap)':<32} "
+                  f"{time.perf_counter() - start:>8.2f} {pages:>6}")
+
+            path = os.path.join(tmp, f"{name}-writer.pdf")
+            start = time.perf_counter()
+            writer = PdfTextWriter(path)
+            writer.write_lines(lines)
+            writer.save()
+            print(f"{name:<10} {'PdfTextWriter (wrapped)':<32} "
+                  f"{time.perf_counter() - start:>8.2f} {writer.canvas.getPageNumber():>6}")
+
+
+FIRST_FRAME_SCRIPT = """
+import time
+start = time.perf_counter()
+import tkinter as tk
+import {module}
+root = tk.Tk()
+app = {module}.TranslationApp(root)
+root.update()
+print(time.perf_counter() - start)
+root.destroy()
+"""
+
+# The parts of TranslationApp.__init__ that do not need a display: the
+# translator, journal, incremental state and audio cache. Also lists the
+# slow optional modules loaded by then, which should be none
+SERVICES_SCRIPT = """
+import sys
+import time
+import {module}
+start = time.perf_counter()
+translator = {module}.create_translator()
+{module}.JobJournal()
+{module}.IncrementalTranslator(translator)
+{module}.AudioCache()
+print(time.perf_counter() - start)
+print(" ".join(name for name in ("googletrans", "httpx", "reportlab", "gtts", "pygame", "fitz")
+               if name in sys.modules))
+"""
+
+
+def import_times(module):
+    # Parses `python -X importtime` output into [(depth, name, self_us, cumulative_us)]
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def bench_startup(args):
+    totals = []
+    for _ in range(args.runs):
+        rows = import_times(args.module)
+        end = max(i for i, row in enumerate(rows) if row[0] == 0 and row[1] == args.module)
+        totals.append(rows[end][3] / 1000)
+    print(f"import {args.module}: median {percentile(totals, 0.5):.1f} ms over {args.runs} runs")
+
+    # Slowest direct imports of the module in the last run; its imports are
+    # listed between the previous top-level entry and its own
+    start = max((i for i, row in enumerate(rows[:end]) if row[0] == 0), default=-1) + 1
+    direct = sorted((row for row in rows[start:end] if row[0] == 1), key=lambda row: row[3],
+                    reverse=True)
+    print(f"{'Module':<28} {'Self ms':>8} {'Total ms':>9}")
+    for _, name, self_us, cumulative_us in direct[:args.top]:
+        print(f"{name:<28} {self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}")
+
+    constructions = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, "-c", SERVICES_SCRIPT.format(module=args.module)],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+        seconds, loaded = (result.stdout.split("\n") + [""])[:2]
+        constructions.append(float(seconds) * 1000)
+    print(f"App services construction: median {percentile(constructions, 0.5):.1f} ms"
+          f" (slow modules loaded: {loaded.strip() or 'none'})")
+
+    # Time to first frame needs a display
+    script = FIRST_FRAME_SCRIPT.format(module=args.module)
+    frames = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, "-c", script],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print("Time to first frame: skipped (" + result.stderr.strip().splitlines()[-1] + ")")
+            return
+        frames.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    print(f"Time to first frame: median {percentile(frames, 0.5):.1f} ms")
+
+
+def post_json(port, path, payload):
+    import http.client
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('POST', path, json.dumps(payload).encode('utf-8'),
+                           {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def bench_service(args):
+    # N clients translating the same document at the same time, through the
+    # HTTP service, against one process per client
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from translation_service import TranslationService
+
+    text = "\n".join(sample_lines(args.lines))
+    request = {'text': text, 'src': 'ar', 'dest': 'en'}
+
+    backends = [StubBackend(latency=args.latency) for _ in range(args.clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        list(executor.map(lambda backend: BatchTranslator(backend).translate_text(text, 'ar', 'en'),
+                          backends))
+    separate_time = time.perf_counter() - start
+    separate_requests = sum(backend.requests for backend in backends)
+
+    backend = StubBackend(latency=args.latency)
+    service = TranslationService(BatchTranslator(backend))
+    started = threading.Event()
+    address = []
+    loop = asyncio.new_event_loop()
+
+    def ready(sockname):
+        address.append(sockname[1])
+        started.set()
+
+    server = threading.Thread(target=loop.run_until_complete,
+                              args=(service.serve('127.0.0.1', 0, ready),), daemon=True)
+    server.start()
+    started.wait()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        statuses = list(executor.map(lambda _: post_json(address[0], '/translate', request)[0],
+                                     range(args.clients)))
+    service_time = time.perf_counter() - start
+    service.close()
+
+    print(f"Clients: {args.clients}, lines: {args.lines}, "
+          f"simulated latency: {args.latency * 1000:.0f} ms/request")
+    print(f"Per-client engines: {separate_requests} backend requests, {separate_time:.2f} s")
+    print(f"Shared service:     {backend.requests} backend requests, {service_time:.2f} s, "
+          f"{service.metrics.coalesced.get('/translate', 0)} request(s) coalesced, "
+          f"{statuses.count(200)}/{len(statuses)} OK")
+
+
+def bench_suite(args):
+    names = [name.strip() for name in args.documents.split(',')] if args.documents else None
+    report = benchmark_suite.run_suite(pages=args.pages, repeat=args.repeat,
+                                       latency=args.latency, extract_backend=args.backend,
+                                       names=names)
+    print(benchmark_suite.format_results(report))
+    if args.output:
+        benchmark_suite.save_results(report, args.output)
+        print(f"Results saved to {args.output}")
+
+
+def bench_compare(args):
+    changes = benchmark_suite.compare(benchmark_suite.load_results(args.baseline),
+                                      benchmark_suite.load_results(args.current),
+                                      args.threshold)
+    print(benchmark_suite.format_comparison(changes))
+    regressions = sum(1 for change in changes if change[-1])
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    if regressions:
+        sys.exit(1)
+
+
+def bench_instrumentation(args):
+    # Cost of a span around an empty block, disabled and enabled, and of the
+    # whole pipeline with aggregation and tracing on
+    from instrumentation import recorder, span
+
+    def empty_spans():
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            with span('bench', chars=1):
+                pass
+        return (time.perf_counter() - start) / args.calls * 1e9
+
+    baseline_start = time.perf_counter()
+    for _ in range(args.calls):
+        pass
+    baseline = (time.perf_counter() - baseline_start) / args.calls * 1e9
+
+    recorder.disable()
+    disabled = empty_spans()
+    recorder.enable()
+    enabled = empty_spans()
+    recorder.enable(trace=True)
+    traced = empty_spans()
+    recorder.disable()
+    recorder.reset()
+    print(f"Empty loop: {baseline:.0f} ns/iteration")
+    print(f"Span disabled: {disabled:.0f} ns, enabled: {enabled:.0f} ns, "
+          f"enabled with trace: {traced:.0f} ns")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.pdf")
+        benchmark_suite.write_pdf(path, benchmark_suite.synthetic_pages('arabic', args.pages))
+        # One discarded run first: imports, caches and the allocator warm up
+        # there instead of inside the first timed mode
+        with tempfile.TemporaryDirectory(dir=tmp) as work:
+            benchmark_suite.run_stages(path, 'en', work, 0.0, None)
+        # Modes alternate run by run, so drift of the machine affects both alike
+        runs = {'disabled': [], 'traced': []}
+        recorder.start_profiling()
+        for _ in range(args.repeat):
+            for mode, times in runs.items():
+                if mode == 'traced':
+                    recorder.enable(trace=True)
+                else:
+                    recorder.disable()
+                with tempfile.TemporaryDirectory(dir=tmp) as work:
+                    start = time.perf_counter()
+                    benchmark_suite.run_stages(path, 'en', work, 0.0, None)
+                    times.append(time.perf_counter() - start)
+        paths = recorder.stop_profiling(os.path.join(tmp, "profiles"))
+        with open(paths[-2], encoding='utf-8') as f:
+            events = len(json.load(f)['traceEvents'])
+        timings = {mode: percentile(times, 0.5) for mode, times in runs.items()}
+        print(f"Pipeline ({args.pages} synthetic pages): {timings['disabled']:.3f} s disabled, "
+              f"{timings['traced']:.3f} s traced ({events} trace events, "
+              f"{timings['traced'] / timings['disabled'] - 1:+.1%})")
+        print(recorder.format_summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translation pipeline benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batching = subparsers.add_parser('batching', help="Per-line loop vs batched engine")
+    batching.add_argument('--lines', type=int, default=2000)
+    batching.add_argument('--latency', type=float, default=0.02)
+    batching.set_defaults(func=bench_batching)
+
+    cache = subparsers.add_parser('cache', help="Cold vs warm run through the translation cache")
+    cache.add_argument('--lines', type=int, default=2000)
+    cache.add_argument('--latency', type=float, default=0.02)
+    cache.set_defaults(func=bench_cache)
+
+    concurrency = subparsers.add_parser('concurrency',
+                                        help="Sequential vs concurrent multi-language translation")
+    concurrency.add_argument('--lines', type=int, default=5000)
+    concurrency.add_argument('--latency', type=float, default=0.05)
+    concurrency.add_argument('--dests', default='en,fr')
+    concurrency.add_argument('--workers', type=int, default=8)
+    concurrency.set_defaults(func=bench_concurrency)
+
+    segmentation = subparsers.add_parser('segmentation',
+                                         help="Request counts with line vs sentence segments")
+    segmentation.set_defaults(func=bench_segmentation)
+
+    extraction = subparsers.add_parser('extraction', help="PyPDF2 vs PyMuPDF page extraction")
+    extraction.add_argument('--pages', type=int, default=500,
+                            help="Pages in the synthetic document")
+    extraction.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    extraction.set_defaults(func=bench_extraction)
+
+    memory = subparsers.add_parser('memory', help="Translation memory lookups at scale")
+    memory.add_argument('--entries', type=int, default=100000)
+    memory.add_argument('--queries', type=int, default=1000)
+    memory.set_defaults(func=bench_memory)
+
+    local = subparsers.add_parser('local-backend', help="Offline phrase-table backend latency")
+    local.add_argument('--entries', type=int, default=200000)
+    local.add_argument('--lines', type=int, default=5000)
+    local.set_defaults(func=bench_local_backend)
+
+    shaping = subparsers.add_parser('shaping', help="Whole-document vs per-line display shaping")
+    shaping.add_argument('--pages', type=int, default=100)
+    shaping.add_argument('--lines-per-page', type=int, default=30)
+    shaping.set_defaults(func=bench_shaping)
+
+    pdf_export = subparsers.add_parser('pdf-export', help="PDF writing throughput")
+    pdf_export.add_argument('--lines', type=int, default=5000)
+    pdf_export.set_defaults(func=bench_pdf_export)
+
+    startup = subparsers.add_parser('startup', help="GUI import time and time to first frame")
+    startup.add_argument('--module', default='test_interface3')
+    startup.add_argument('--runs', type=int, default=5)
+    startup.add_argument('--top', type=int, default=10)
+    startup.set_defaults(func=bench_startup)
+
+    service = subparsers.add_parser('service',
+                                    help="Concurrent identical clients through the HTTP service")
+    service.add_argument('--clients', type=int, default=8)
+    service.add_argument('--lines', type=int, default=2000)
+    service.add_argument('--latency', type=float, default=0.05)
+    service.set_defaults(func=bench_service)
+
+    instrumentation = subparsers.add_parser('instrumentation',
+                                            help="Span overhead, disabled and enabled")
+    instrumentation.add_argument('--calls', type=int, default=200000)
+    instrumentation.add_argument('--pages', type=int, default=100)
+    instrumentation.add_argument('--repeat', type=int, default=3)
+    instrumentation.set_defaults(func=bench_instrumentation)
+
+    suite = subparsers.add_parser('suite', help="Per-stage throughput, latency and peak memory "
+                                                "over bundled and synthetic documents")
+    suite.add_argument('--pages', type=int, default=200, help="Pages per synthetic corpus")
+    suite.add_argument('--repeat', type=int, default=3)
+    suite.add_argument('--latency', type=float, default=0.0,
+                       help="Simulated backend latency per request")
+    suite.add_argument('--backend', choices=['fitz', 'pypdf2'], default=None,
+                       help="PDF extraction backend")
+    suite.add_argument('--documents', default=None, help="Comma-separated document names")
+    suite.add_argument('--output', default=None, help="Write the results to this JSON file")
+    suite.set_defaults(func=bench_suite)
+
+    compare = subparsers.add_parser('compare', help="Compare two suite result files")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=benchmark_suite.DEFAULT_THRESHOLD,
+                         help="Relative increase reported as a regression")
+    compare.set_defaults(func=bench_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
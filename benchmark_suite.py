@@ -0,0 +1,273 @@
+# Reproducible stage benchmarks
+#
+# Usage:
+#   python benchmark.py suite --output results.json
+#   python benchmark.py compare baseline.json results.json
+#
+# Runs every document through the same stages as the GUI and the batch
+# command: extraction -> segmentation -> translation -> PDF export -> text
+# to speech. Documents are the bundled PDFs plus synthetic Arabic and
+# Latin corpora generated from a fixed seed (written to PDF first, so they
+# go through extraction too). Translation uses the local StubBackend and
+# speech the stub TTS engine, so runs are deterministic and offline.
+#
+# Each stage reports items, throughput, per-item latency percentiles and
+# the peak of Python heap allocations (tracemalloc, measured in a separate
+# pass so that tracing does not skew the timings). Results are stored as
+# JSON together with the commit and environment, and compare() flags
+# stages that became slower or use more memory between two result files.
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from audio_cache import AudioCache
+from pdf_export import PdfTextWriter
+from pdf_extract import default_backend, iter_pages_timed
+from segmenter import segment_text
+from translation_engine import BatchTranslator, StubBackend
+from tts import Speech
+
+BUNDLED_PDFS = ["1954.pdf", "tr_lt.pdf"]
+STAGES = ['extraction', 'segmentation', 'translation', 'export', 'tts']
+SEED = 1954
+LINES_PER_PAGE = 40
+TTS_MAX_CHARS = 20000  # speech is only synthesized for the start of a document
+DEFAULT_THRESHOLD = 0.10
+# Changes smaller than this are timer or allocator noise, whatever the ratio
+MIN_DELTAS = {'seconds': 0.005, 'p90_ms': 0.5, 'peak_memory_bytes': 256 * 1024}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def synthetic_pages(language, pages, seed=SEED):
+    rng = random.Random(f"{seed}-{language}")
+    if language == 'arabic':
+        letters = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+    else:
+        letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(2, 9)))
+                  for _ in range(3000)]
+    # Headers repeat on every page, like in the scanned archives
+    header = " ".join(rng.choice(vocabulary) for _ in range(6))
+    return [header + "\n" + "\n".join(
+                " ".join(rng.choice(vocabulary) for _ in range(rng.randint(4, 14))) + "."
+                for _ in range(LINES_PER_PAGE))
+            for _ in range(pages)]
+
+
+def write_pdf(path, pages):
+    writer = PdfTextWriter(path)
+    for text in pages:
+        writer.write_page(text)
+    writer.save()
+
+
+def documents(directory, pages):
+    # [(name, pdf_path, target_language)]
+    here = os.path.dirname(os.path.abspath(__file__))
+    docs = [(name, os.path.join(here, name), 'en') for name in BUNDLED_PDFS
+            if os.path.exists(os.path.join(here, name))]
+    for language, dest in (('arabic', 'en'), ('latin', 'ar')):
+        path = os.path.join(directory, f"synthetic-{language}.pdf")
+        write_pdf(path, synthetic_pages(language, pages))
+        docs.append((f"synthetic-{language}", path, dest))
+    return docs
+
+
+def timed(items, func):
+    # Runs func on every item; returns (results, per-item seconds, total seconds)
+    results = []
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        results.append(func(item))
+        latencies.append(time.perf_counter() - item_start)
+    return results, latencies, time.perf_counter() - start
+
+
+def run_stages(pdf_path, dest, directory, latency, extract_backend, on_stage=None):
+    # One pass over every stage; returns {stage: (items, chars, latencies, seconds)}.
+    # on_stage(name) is called as each stage starts, and with None at the end
+    on_stage = on_stage or (lambda stage: None)
+    stats = {}
+
+    on_stage('extraction')
+    start = time.perf_counter()
+    extracted = list(iter_pages_timed(pdf_path, extract_backend, workers=1))
+    pages = [text for _, text, _ in extracted]
+    chars = sum(map(len, pages))
+    stats['extraction'] = (len(pages), chars, [seconds for _, _, seconds in extracted],
+                           time.perf_counter() - start)
+
+    on_stage('segmentation')
+    segmented, latencies, seconds = timed(pages, segment_text)
+    stats['segmentation'] = (sum(map(len, segmented)), chars, latencies, seconds)
+
+    on_stage('translation')
+    translator = BatchTranslator(StubBackend(latency=latency))
+    translations, latencies, seconds = timed(
+        pages, lambda text: translator.translate_text(text, None, dest))
+    stats['translation'] = (len(pages), chars, latencies, seconds)
+
+    on_stage('export')
+    writer = PdfTextWriter(os.path.join(directory, "export.pdf"))
+    _, latencies, seconds = timed(translations, writer.write_page)
+    start = time.perf_counter()
+    writer.save()
+    seconds += time.perf_counter() - start
+    stats['export'] = (len(translations), sum(map(len, translations)), latencies, seconds)
+
+    on_stage('tts')
+    text = "\n".join(translations)[:TTS_MAX_CHARS]
+    speech = Speech(text, dest, AudioCache(os.path.join(directory, "audio")), engine='stub')
+    _, latencies, seconds = timed(range(len(speech.chunks)), speech.synthesize_chunk)
+    stats['tts'] = (len(speech.chunks), len(text), latencies, seconds)
+    on_stage(None)
+    return stats
+
+
+def peak_memory(pdf_path, dest, directory, latency, extract_backend):
+    # {stage: peak traced bytes above the stage's starting point}, from one
+    # extra run with tracemalloc
+    peaks = {}
+    current = [None, 0]  # stage, traced bytes when it started
+
+    def on_stage(stage):
+        traced, peak = tracemalloc.get_traced_memory()
+        if current[0] is not None:
+            peaks[current[0]] = peak - current[1]
+        tracemalloc.reset_peak()
+        current[:] = [stage, traced]
+
+    tracemalloc.start()
+    try:
+        run_stages(pdf_path, dest, directory, latency, extract_backend, on_stage)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def summarize(document, stage, runs, peak):
+    # runs: [(items, chars, latencies, seconds)] from repeated passes
+    items, chars = runs[0][0], runs[0][1]
+    seconds = percentile([run[3] for run in runs], 0.5)
+    latencies = [latency for run in runs for latency in run[2]]
+    return {
+        'document': document,
+        'stage': stage,
+        'items': items,
+        'chars': chars,
+        'seconds': seconds,
+        'items_per_second': items / seconds if seconds else 0.0,
+        'chars_per_second': chars / seconds if seconds else 0.0,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p90_ms': percentile(latencies, 0.9) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': max(latencies, default=0.0) * 1000,
+        'peak_memory_bytes': peak,
+    }
+
+
+def run_suite(pages=200, repeat=3, latency=0.0, extract_backend=None, names=None,
+              progress=print):
+    extract_backend = extract_backend or default_backend()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, path, dest in documents(tmp, pages):
+            if names and name not in names:
+                continue
+            runs = []
+            for i in range(repeat):
+                with tempfile.TemporaryDirectory(dir=tmp) as work:
+                    runs.append(run_stages(path, dest, work, latency, extract_backend))
+            with tempfile.TemporaryDirectory(dir=tmp) as work:
+                peaks = peak_memory(path, dest, work, latency, extract_backend)
+            for stage in STAGES:
+                results.append(summarize(name, stage, [run[stage] for run in runs],
+                                         peaks.get(stage, 0)))
+            if progress:
+                progress(f"{name}: {runs[0]['extraction'][0]} page(s), {repeat} run(s)")
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'config': {
+            'pages': pages,
+            'repeat': repeat,
+            'latency': latency,
+            'extract_backend': extract_backend,
+            'seed': SEED,
+        },
+        'results': results,
+    }
+
+
+def format_results(report):
+    lines = [f"{'Document':<18} {'Stage':<13} {'Items':>7} {'Seconds':>8} {'Items/s':>10} "
+             f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'Peak MB':>8}"]
+    for row in report['results']:
+        lines.append(f"{row['document']:<18} {row['stage']:<13} {row['items']:>7} "
+                     f"{row['seconds']:>8.3f} {row['items_per_second']:>10.1f} "
+                     f"{row['p50_ms']:>8.2f} {row['p90_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+                     f"{row['peak_memory_bytes'] / 1e6:>8.1f}")
+    return "\n".join(lines)
+
+
+def save_results(report, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    # Returns [(document, stage, metric, old, new, change, regressed)] for
+    # the stage time, p90 latency and peak memory of stages in both reports.
+    # A change is a regression if it is above both the threshold and MIN_DELTAS
+    old_rows = {(row['document'], row['stage']): row for row in baseline['results']}
+    changes = []
+    for row in current['results']:
+        old = old_rows.get((row['document'], row['stage']))
+        if old is None:
+            continue
+        for metric, min_delta in MIN_DELTAS.items():
+            before, after = old[metric], row[metric]
+            change = (after - before) / before if before else 0.0
+            changes.append((row['document'], row['stage'], metric, before, after, change,
+                            change > threshold and after - before > min_delta))
+    return changes
+
+
+def format_comparison(changes):
+    lines = [f"{'Document':<18} {'Stage':<13} {'Metric':<18} {'Before':>12} {'After':>12} "
+             f"{'Change':>8}"]
+    for document, stage, metric, before, after, change, regressed in changes:
+        lines.append(f"{document:<18} {stage:<13} {metric:<18} {before:>12.3f} {after:>12.3f} "
+                     f"{change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    return "\n".join(lines)
@@ -0,0 +1,65 @@
+# Segment deduplication
+#
+# Historical documents repeat headers, footers, page numbers and stamps on
+# every page. Segments are normalized (whitespace, Arabic diacritics and
+# tatweel, Arabic-Indic digits) so that each distinct segment is translated
+# once and the result is fanned back out to every occurrence.
+
+import re
+import threading
+import unicodedata
+
+# Harakat, Quranic annotation marks, superscript alef and tatweel
+_STRIP_CHARS = re.compile("[ؐ-ًؚ-ٰٟۖ-ۭـ]")
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+
+
+def normalize_segment(text):
+    text = unicodedata.normalize('NFC', text)
+    text = _STRIP_CHARS.sub("", text).translate(_DIGITS)
+    return " ".join(text.split())
+
+
+def group_segments(segments, indices):
+    # Returns {normalized_key: [indices...]} preserving first-occurrence order
+    groups = {}
+    for i in indices:
+        groups.setdefault(normalize_segment(segments[i]), []).append(i)
+    return groups
+
+
+class DedupIndex:
+    # Per-document record of translated segments and dedup statistics
+    def __init__(self):
+        self.translations = {}
+        self.keys = set()
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def observe(self, groups):
+        with self.lock:
+            self.total += sum(len(members) for members in groups.values())
+            self.keys.update(groups)
+
+    def get(self, key, dest):
+        return self.translations.get((key, dest))
+
+    def put(self, key, dest, translation):
+        with self.lock:
+            self.translations[(key, dest)] = translation
+
+    @property
+    def unique(self):
+        return len(self.keys)
+
+    @property
+    def ratio(self):
+        # Fraction of segments that did not need their own translation
+        return 1 - self.unique / self.total if self.total else 0.0
+
+    def stats(self):
+        return {
+            'segments': self.total,
+            'unique': self.unique,
+            'dedup_ratio': self.ratio,
+        }
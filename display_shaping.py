@@ -0,0 +1,106 @@
+# Display shaping for Arabic text
+#
+# Consoles and widgets without complex text layout need Arabic reshaped into
+# presentation forms and reordered into visual order before printing. This
+# is only done when text is rendered, one line at a time (reordering never
+# crosses a line break), and shaped lines are memoized, so repeated lines
+# and re-rendered pages cost a dictionary lookup. Lines without Arabic
+# letters are returned unchanged. Lines that still need shaping are
+# reshaped in a single call, and the compiled get_display of python-bidi
+# >= 0.5 is preferred over the pure-Python bidi.algorithm.
+#
+# The compiled get_display reorders but does not mirror: "(سنة)" comes out
+# as ")ةنس(". Lines with mirrored characters (brackets, quotes, <>) go
+# through bidi.algorithm, which does; all other lines keep the compiled
+# fast path.
+
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from instrumentation import span
+
+CACHE_SIZE = 16384
+
+_ARABIC = re.compile("[؀-ۿݐ-ݿࢠ-ࣿﭐ-﷿ﹰ-﻿]")
+
+_shaped = OrderedDict()  # line -> shaped line, least recently used first
+_lock = threading.Lock()
+
+
+def contains_arabic(text):
+    return _ARABIC.search(text) is not None
+
+
+@lru_cache(maxsize=None)
+def _shapers():
+    import arabic_reshaper
+    from bidi.algorithm import get_display as algorithm_display
+    try:
+        from bidi import get_display as compiled_display
+    except ImportError:
+        return arabic_reshaper.reshape, algorithm_display
+    from bidi.mirror import MIRRORED
+
+    def get_display(line):
+        if any(char in MIRRORED for char in line):
+            return algorithm_display(line)
+        return compiled_display(line)
+
+    return arabic_reshaper.reshape, get_display
+
+
+def shape_lines(lines):
+    # Returns the lines shaped for display, in order
+    shaped = [None] * len(lines)
+    missing = {}
+    with _lock:
+        for i, line in enumerate(lines):
+            if not contains_arabic(line):
+                shaped[i] = line
+            elif line in _shaped:
+                _shaped.move_to_end(line)
+                shaped[i] = _shaped[line]
+            else:
+                missing.setdefault(line, []).append(i)
+    if not missing:
+        return shaped
+
+    reshape, get_display = _shapers()
+    sources = list(missing)
+    with span('reshape', lines=len(sources)):
+        # Reshaping never joins letters across a line break
+        reshaped = reshape("\n".join(sources)).split("\n")
+        if len(reshaped) != len(sources):
+            reshaped = [reshape(line) for line in sources]
+        results = [get_display(line) for line in reshaped]
+    with _lock:
+        for line, result in zip(sources, results):
+            for i in missing[line]:
+                shaped[i] = result
+            _shaped[line] = result
+        while len(_shaped) > CACHE_SIZE:
+            _shaped.popitem(last=False)
+    return shaped
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def reshape_word(word):
+    # Letters never join across whitespace, so words can be reshaped alone
+    return _shapers()[0](word)
+
+
+def visual_order(text):
+    # Reorders already reshaped text for display
+    return _shapers()[1](text)
+
+
+def shape_for_display(text):
+    return "\n".join(shape_lines(text.split("\n")))
+
+
+def clear_cache():
+    with _lock:
+        _shaped.clear()
+    reshape_word.cache_clear()
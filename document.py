@@ -0,0 +1,169 @@
+# Segment-aligned document model
+#
+# A document is a flat list of segments, each holding its source text, the
+# separator that followed it, its translation, a status and the page it
+# came from. Incremental translation, the GUI, PDF export and text to
+# speech all read from and write to the same Document, so the text is not
+# copied out of and re-split from Tk widgets at every step. Segments use
+# __slots__ to stay small in documents with hundreds of thousands of them.
+
+from segmenter import segment_text
+
+PENDING = 'pending'
+TRANSLATED = 'translated'
+EDITED = 'edited'
+
+
+class DocumentSegment:
+    __slots__ = ('source', 'end', 'translation', 'status', 'page')
+
+    def __init__(self, source, end, page=None, translation=None, status=PENDING):
+        self.source = source
+        self.end = end
+        self.page = page
+        self.translation = translation
+        self.status = status
+
+
+class Document:
+    def __init__(self, segments=None, src=None, dest=None):
+        self.segments = segments if segments is not None else []
+        self.src = src
+        self.dest = dest
+
+    @classmethod
+    def from_text(cls, text, page=None, src=None, dest=None):
+        return cls([DocumentSegment(segment.text, segment.end, page)
+                    for segment in segment_text(text)], src, dest)
+
+    @classmethod
+    def from_pages(cls, pages, src=None, dest=None):
+        # pages: iterable of (page_index, text); every page ends a line
+        document = cls(src=src, dest=dest)
+        for index, text in pages:
+            document.add_page(index, text)
+        return document
+
+    def untranslated(self, src=None, dest=None):
+        # A new document with the same segments and no translations
+        return Document([DocumentSegment(segment.source, segment.end, segment.page)
+                         for segment in self.segments], src, dest)
+
+    def add_page(self, index, text):
+        segments = [DocumentSegment(segment.text, segment.end, index)
+                    for segment in segment_text(text)]
+        if self.segments and self.segments[-1].end == "":
+            self.segments[-1].end = "\n"
+        self.segments.extend(segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def sources(self):
+        return [segment.source for segment in self.segments]
+
+    def pending(self):
+        return [i for i, segment in enumerate(self.segments) if segment.translation is None]
+
+    def set_translations(self, indices, translations, status=TRANSLATED):
+        for i, translation in zip(indices, translations):
+            segment = self.segments[i]
+            segment.translation = translation
+            segment.status = status
+
+    def pages(self):
+        return sorted({segment.page for segment in self.segments if segment.page is not None})
+
+    def source_text(self):
+        return "".join(segment.source + segment.end for segment in self.segments)
+
+    def translated_text(self):
+        return "".join(text + end for text, end in self.translated_pieces())
+
+    def translated_pieces(self):
+        # (translation, separator) per segment; segments emptied by an edit
+        # of their line are skipped together with their separator
+        for segment in self.segments:
+            if segment.translation == "" and segment.end == " ":
+                continue
+            yield segment.translation or "", segment.end
+
+    def line_groups(self):
+        # Lists of segment indices that make up one output line
+        groups = []
+        current = []
+        for i, segment in enumerate(self.segments):
+            current.append(i)
+            if segment.end != " ":
+                groups.append(current)
+                current = []
+        if current:
+            groups.append(current)
+        return groups
+
+    def blocks(self):
+        # (source, translation) per output line
+        return [(" ".join(self.segments[i].source for i in group),
+                 " ".join(filter(None, (self.segments[i].translation for i in group))))
+                for group in self.line_groups()]
+
+    def translation_lines(self):
+        # The translated text split into lines, as written to a PDF
+        lines = []
+        current = []
+        for text, end in self.translated_pieces():
+            current.append(text)
+            if end == " ":
+                current.append(" ")
+            elif end:
+                lines.append("".join(current))
+                current = []
+                lines.extend([""] * (end.count("\n") - 1))
+        if current:
+            lines.append("".join(current))
+        return lines
+
+    def line_slots(self):
+        # The line_groups() index of each line of translation_lines(), None
+        # for the blank lines between paragraphs
+        slots = []
+        for g, group in enumerate(self.line_groups()):
+            slots.append(g)
+            slots.extend([None] * (self.segments[group[-1]].end.count("\n") - 1))
+        return slots
+
+    def apply_edits(self, modified_text):
+        # Applies an edited translation, one line per output line, compared
+        # line by line (lines translated to "" stay in place). Returns the
+        # (source, edited translation) pairs that changed, or None if the
+        # edit no longer lines up with the segments
+        groups = self.line_groups()
+        blocks = self.blocks()
+        slots = self.line_slots()
+        lines = modified_text.split("\n")
+        while len(lines) > len(slots) and not lines[-1].strip():
+            lines.pop()
+        if len(lines) != len(slots):
+            return None
+        if any(slot is None and line.strip() for slot, line in zip(slots, lines)):
+            return None
+        edits = []
+        for slot, line in zip(slots, lines):
+            if slot is None:
+                continue
+            group = groups[slot]
+            source, old = blocks[slot]
+            line = line.strip()
+            if line == old:
+                continue
+            edits.append((source, line))
+            # The whole line is kept on its last segment
+            for i in group[:-1]:
+                self.segments[i].translation = ""
+                self.segments[i].status = EDITED
+            self.segments[group[-1]].translation = line
+            self.segments[group[-1]].status = EDITED
+        return edits
@@ -0,0 +1,254 @@
+# Virtualized text views for large documents
+#
+# A Tk Text widget holding a whole multi-hundred-page document is slow to
+# scroll, search and read back. These views keep the document as a list of
+# lines in memory and only put the lines of the visible window into the
+# Text widget; scrolling re-renders the window, so the cost of a redraw
+# does not depend on the size of the document. Edits made in the window
+# are written back to the line store before it is re-rendered or read.
+#
+# DocumentView shows (source, translation) segment pairs side by side with
+# a shared scrollbar; rows are padded so that each pair starts on the same
+# display line in both panes.
+#
+# Windows are counted in store lines (or pairs), but a long line wraps to
+# many display lines, so the wheel, page keys and scrollbar arrows first
+# scroll the Text widget's own contents and only move the window once the
+# top or bottom of what is rendered has been reached.
+
+import tkinter as tk
+
+from incremental import splice_range
+
+WHEEL_LINES = 3
+
+
+class LineStore:
+    def __init__(self, text=""):
+        self.set_text(text)
+
+    def set_text(self, text):
+        self.lines = text.split("\n")
+
+    def text(self):
+        return "\n".join(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def window(self, first, count):
+        return self.lines[first:first + count]
+
+    def replace(self, first, count, lines):
+        self.lines[first:first + count] = lines
+
+
+def bind_scrolling(widget, scroll):
+    # Mouse wheel (Windows/macOS and X11) and page keys scroll the view
+    # instead of the Text widget's own contents
+    def on_wheel(event):
+        scroll(-WHEEL_LINES if event.delta > 0 else WHEEL_LINES, 'units')
+        return "break"
+
+    widget.bind('<MouseWheel>', on_wheel)
+    widget.bind('<Button-4>', lambda event: scroll(-WHEEL_LINES, 'units') or "break")
+    widget.bind('<Button-5>', lambda event: scroll(WHEEL_LINES, 'units') or "break")
+    widget.bind('<Prior>', lambda event: scroll(-1, 'pages') or "break")
+    widget.bind('<Next>', lambda event: scroll(1, 'pages') or "break")
+
+
+def scroll_within(panes, amount, what):
+    # Scrolls the rendered contents; returns False if already at the top
+    # (amount < 0) or bottom (amount > 0)
+    top, bottom = panes[0].yview()
+    if (top <= 0.0 and amount < 0) or (bottom >= 1.0 and amount > 0):
+        return False
+    for pane in panes:
+        pane.yview_scroll(amount, what)
+    return True
+
+
+class VirtualText(tk.Frame):
+    # Drop-in for the ScrolledText areas: get_text()/set_text() replace
+    # get("1.0", tk.END) and delete/insert of the whole contents
+    def __init__(self, parent, height=8, readonly=False, **options):
+        super().__init__(parent, bg=options.get('bg'))
+        self.store = LineStore()
+        self.readonly = readonly
+        self.rows = height
+        self.first = 0
+        self.rendered = 0  # store lines currently in the widget
+
+        self.text = tk.Text(self, height=height, wrap=tk.WORD, **options)
+        self.scrollbar = tk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        bind_scrolling(self.text, self.scroll)
+        self.text.bind('<Up>', self.on_up)
+        self.text.bind('<Down>', self.on_down)
+        self.render()
+
+    def sync(self):
+        # Writes edits made in the visible window back to the store
+        if self.text.edit_modified():
+            lines = self.text.get("1.0", "end-1c").split("\n")
+            self.store.replace(self.first, self.rendered, lines)
+            self.rendered = len(lines)
+            self.text.edit_modified(False)
+
+    def render(self):
+        insert = self.text.index(tk.INSERT)
+        lines = self.store.window(self.first, self.rows)
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.mark_set(tk.INSERT, insert)
+        self.text.edit_modified(False)
+        if self.readonly:
+            self.text.configure(state=tk.DISABLED)
+        self.rendered = len(lines)
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = max(1, len(self.store))
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + self.rows) / total))
+
+    def scroll_to(self, first):
+        self.sync()
+        first = max(0, min(first, len(self.store) - self.rows))
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def scroll(self, amount, what='units'):
+        if scroll_within([self.text], amount, what):
+            return
+        previous = self.first
+        step = self.rows - 1 if what == 'pages' else 1
+        self.scroll_to(self.first + amount * max(1, step))
+        if self.first < previous:
+            # Going up: show the end of the lines revealed above the old window
+            self.text.yview(f"{previous - self.first + 1}.0")
+            self.text.yview_scroll(amount, what)
+
+    def yview(self, *args):
+        # Scrollbar protocol: ('moveto', fraction) or ('scroll', n, what)
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.store)))
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]), args[2])
+
+    def on_up(self, event):
+        # Only from the first display line; within wrapped lines Tk moves the cursor
+        if self.text.compare(tk.INSERT, "<", "1.0 display lineend") and self.first > 0:
+            self.scroll_to(self.first - 1)
+            self.text.mark_set(tk.INSERT, "1.0")
+
+    def on_down(self, event):
+        if self.text.compare(tk.INSERT, ">=", "end-1c display linestart"):
+            self.scroll_to(self.first + 1)
+            self.text.see(tk.INSERT)
+
+    def line_count(self):
+        self.sync()
+        return len(self.store)
+
+    def get_text(self):
+        self.sync()
+        return self.store.text()
+
+    def set_text(self, text, keep_position=False):
+        if keep_position:
+            # Only re-render if the changed lines are visible
+            self.sync()
+            old = self.store.lines
+            new = text.split("\n")
+            start, old_end, new_end = splice_range(old, new)
+            self.store.lines = new
+            if old_end <= self.first and start < self.first:
+                # Changed above the window: keep showing the same lines
+                self.first = max(0, self.first + new_end - old_end)
+                self.update_scrollbar()
+            elif start >= self.first + self.rendered and self.rendered == self.rows:
+                self.update_scrollbar()
+            else:
+                self.first = max(0, min(self.first, len(new) - self.rows))
+                self.render()
+            return
+        self.store.set_text(text)
+        self.first = 0
+        self.render()
+
+    def clear(self):
+        self.set_text("")
+
+
+class DocumentView(tk.Frame):
+    # Read-only side-by-side view of aligned (source, translation) segments
+    def __init__(self, parent, height=30, **options):
+        super().__init__(parent, bg=options.get('bg'))
+        self.pairs = []
+        self.rows = height
+        self.first = 0
+        self.starts = [[], []]  # per pane, index of each rendered pair
+
+        self.panes = [tk.Text(self, height=height, wrap=tk.WORD, **options),
+                      tk.Text(self, height=height, wrap=tk.WORD, **options)]
+        self.scrollbar = tk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        for pane in self.panes:
+            pane.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            pane.configure(state=tk.DISABLED)
+            bind_scrolling(pane, self.scroll)
+
+    def set_pairs(self, pairs):
+        self.pairs = list(pairs)
+        self.first = 0
+        self.render()
+
+    def render(self):
+        for pane in self.panes:
+            pane.configure(state=tk.NORMAL)
+            pane.delete("1.0", tk.END)
+        self.starts = [[], []]
+        for row in self.pairs[self.first:self.first + self.rows]:
+            starts = [pane.index("end-1c") for pane in self.panes]
+            for pane_starts, start in zip(self.starts, starts):
+                pane_starts.append(start)
+            for pane, text in zip(self.panes, row):
+                pane.insert(tk.END, text + "\n")
+            # Pad the shorter side so the next pair starts on the same line
+            heights = [pane.count(start, "end-1c", "update", "displaylines") or 0
+                       for pane, start in zip(self.panes, starts)]
+            heights = [height[0] if isinstance(height, tuple) else height for height in heights]
+            for pane, height in zip(self.panes, heights):
+                if height < max(heights):
+                    pane.insert(tk.END, "\n" * (max(heights) - height))
+        for pane in self.panes:
+            pane.configure(state=tk.DISABLED)
+        total = max(1, len(self.pairs))
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + self.rows) / total))
+
+    def scroll_to(self, first):
+        first = max(0, min(first, len(self.pairs) - 1))
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def scroll(self, amount, what='units'):
+        if scroll_within(self.panes, amount, what):
+            return
+        previous = self.first
+        step = self.rows - 1 if what == 'pages' else 1
+        self.scroll_to(self.first + amount * max(1, step))
+        if self.first < previous:
+            for pane, starts in zip(self.panes, self.starts):
+                pane.yview(starts[previous - self.first])
+                pane.yview_scroll(amount, what)
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.pairs)))
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]), args[2])
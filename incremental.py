@@ -0,0 +1,110 @@
+# Incremental re-translation
+#
+# The Document of the last translated input is kept with its translations.
+# When the input is translated again, the new segments are diffed against
+# the old ones and only changed or inserted segments are sent to the
+# translator; everything else (including edits accepted by the user) is
+# reused as is.
+
+import difflib
+import threading
+
+from document import Document
+from job_journal import document_id
+
+CHUNK = 1024
+
+
+def common_prefix_length(a, b):
+    # Compares CHUNK items at a time as slices, which runs in C, then finds
+    # the first difference inside the differing chunk
+    size = min(len(a), len(b))
+    i = 0
+    while i < size and a[i:i + CHUNK] == b[i:i + CHUNK]:
+        i += CHUNK
+    i = min(i, size)
+    end = min(i + CHUNK, size)
+    while i < end and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def common_suffix_length(a, b, limit):
+    # Same from the end, over at most limit items
+    i = 0
+    while i < limit:
+        size = min(CHUNK, limit - i)
+        if a[len(a) - i - size:len(a) - i] != b[len(b) - i - size:len(b) - i]:
+            break
+        i += size
+    while i < limit and a[len(a) - i - 1] == b[len(b) - i - 1]:
+        i += 1
+    return i
+
+
+def splice_range(old, new):
+    # Returns (start, old_end, new_end) such that replacing old[start:old_end]
+    # with new[start:new_end] turns old into new
+    start = common_prefix_length(old, new)
+    suffix = common_suffix_length(old, new, min(len(old), len(new)) - start)
+    return start, len(old) - suffix, len(new) - suffix
+
+
+def reuse_translations(old_segments, new_segments):
+    # Copies translations of unchanged segments from old to new. The common
+    # prefix and suffix are matched directly; only the edited middle goes
+    # through SequenceMatcher, which is slow on long documents whose
+    # headers and footers repeat on every page
+    old = [segment.source for segment in old_segments]
+    new = [segment.source for segment in new_segments]
+    start, old_end, new_end = splice_range(old, new)
+    ranges = [(0, 0, start), (old_end, new_end, len(old) - old_end)]
+    matcher = difflib.SequenceMatcher(None, old[start:old_end], new[start:new_end],
+                                      autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ranges.append((start + i1, start + j1, i2 - i1))
+    for i, j, count in ranges:
+        for old_segment, new_segment in zip(old_segments[i:i + count],
+                                            new_segments[j:j + count]):
+            new_segment.translation = old_segment.translation
+            new_segment.status = old_segment.status
+
+
+class IncrementalTranslator:
+    def __init__(self, translator):
+        self.translator = translator
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.document = Document()
+        self.pending_chars = 0  # size of the segments being sent, for throughput
+
+    def translate(self, text, src, dest, progress=None, journal=None, dedup=None):
+        # text may be a string or a Document (e.g. built from PDF pages).
+        # Returns (translated_text, number_of_segments_sent_to_the_translator)
+        with self.lock:
+            if isinstance(text, Document):
+                document = text.untranslated(src, dest)
+            else:
+                document = Document.from_text(text, src=src, dest=dest)
+
+            previous = self.document
+            if (previous.src, previous.dest) == (src, dest) and len(previous):
+                reuse_translations(previous.segments, document.segments)
+
+            changed = document.pending()
+            lines = [document.segments[j].source for j in changed]
+            self.pending_chars = sum(map(len, lines))
+            if lines:
+                # The journal entry is keyed by exactly the lines being sent
+                entry = journal.open(document_id(*lines, src, dest)) if journal else None
+                results = self.translator.translate_lines(lines, src, dest, progress, entry,
+                                                          dedup)
+                if entry is not None:
+                    entry.finish()
+                document.set_translations(changed, results)
+
+            self.document = document
+            return document.translated_text(), len(changed)
@@ -0,0 +1,283 @@
+# Lightweight instrumentation
+#
+# Stages are wrapped in spans:
+#
+#     with span('translate.request', chars=len(text)):
+#         ...
+#
+# Spans aggregate a count, total and maximum time, a latency histogram and
+# counters (chars, pages, ...) per name. While disabled (the default),
+# span() returns a shared no-op object, so an instrumented call costs one
+# function call and an attribute check. Set ARABIC_TRANSLATION_TRACE=1 to
+# enable aggregation at startup.
+#
+# On demand, spans are also kept as Chrome trace events (open the file in
+# chrome://tracing or https://ui.perfetto.dev), and jobs wrapped with
+# profiled() run under cProfile. cProfile only sees the thread it runs on,
+# so each job gets its own profiler and the results are merged when the
+# profile is written; the thread pools started by a job show up in the
+# trace instead.
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "arabic_translation",
+                                   "profiles")
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+MAX_TRACE_EVENTS = 500000
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **counts):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = ('recorder', 'name', 'counts', 'start')
+
+    def __init__(self, recorder, name, counts):
+        self.recorder = recorder
+        self.name = name
+        self.counts = counts
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.recorder.record(self.name, (end - self.start) / 1e9, self.counts, self.start)
+        return False
+
+    def add(self, **counts):
+        # Counts known only once the work is done (e.g. segments produced)
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+
+class SpanStats:
+    __slots__ = ('count', 'total', 'max', 'buckets', 'counts')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.counts = {}
+
+    def add(self, seconds, counts):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(HISTOGRAM_BOUNDS_MS, seconds * 1000)] += 1
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def percentile_ms(self, fraction):
+        # Upper bound of the histogram bucket holding the percentile
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+
+class Recorder:
+    def __init__(self):
+        self.enabled = False
+        self.tracing = False
+        self.profiling = False
+        self.was_enabled = False  # aggregation state before profiling started
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.events = []
+        self.profiles = []
+
+    def enable(self, trace=False):
+        self.tracing = trace or self.tracing
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.tracing = False
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+            self.events = []
+            self.profiles = []
+
+    def record(self, name, seconds, counts=None, start_ns=None):
+        counts = counts or {}
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = SpanStats()
+            stats.add(seconds, counts)
+            if self.tracing and len(self.events) < MAX_TRACE_EVENTS:
+                if start_ns is None:
+                    start_ns = time.perf_counter_ns() - int(seconds * 1e9)
+                self.events.append((name, start_ns, seconds, threading.get_ident(), counts))
+
+    def summary(self):
+        with self.lock:
+            items = sorted(self.stats.items(), key=lambda item: -item[1].total)
+            return [{
+                'name': name,
+                'count': stats.count,
+                'total_s': stats.total,
+                'mean_ms': stats.total / stats.count * 1000,
+                'p50_ms': stats.percentile_ms(0.5),
+                'p90_ms': stats.percentile_ms(0.9),
+                'max_ms': stats.max * 1000,
+                'counts': dict(stats.counts),
+            } for name, stats in items]
+
+    def format_summary(self):
+        lines = [f"{'Span':<20} {'Count':>7} {'Total s':>8} {'Mean ms':>8} {'p90 ms':>8} "
+                 f"{'Max ms':>8}  Counters"]
+        for row in self.summary():
+            counters = ", ".join(f"{key}={value}" for key, value in sorted(row['counts'].items()))
+            lines.append(f"{row['name']:<20} {row['count']:>7} {row['total_s']:>8.3f} "
+                         f"{row['mean_ms']:>8.2f} {row['p90_ms']:>8.1f} {row['max_ms']:>8.1f}"
+                         f"  {counters}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        # Trace Event Format: complete ('X') events with microsecond times
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        origin = min((event[1] for event in events), default=0)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'displayTimeUnit': 'ms',
+                'traceEvents': [{
+                    'name': name,
+                    'cat': name.split('.')[0],
+                    'ph': 'X',
+                    'ts': (start_ns - origin) / 1000,
+                    'dur': seconds * 1e6,
+                    'pid': pid,
+                    'tid': tid,
+                    'args': counts,
+                } for name, start_ns, seconds, tid, counts in events],
+            }, f)
+
+    def start_profiling(self):
+        self.reset()
+        self.was_enabled = self.enabled
+        self.profiling = True
+        self.enable(trace=True)
+
+    def stop_profiling(self, directory=None):
+        # Writes <timestamp>.prof (cProfile of the profiled jobs, if any),
+        # <timestamp>.trace.json and <timestamp>.txt; returns their paths
+        self.profiling = False
+        self.disable()
+        self.enabled = self.was_enabled
+        directory = directory or os.environ.get('ARABIC_TRANSLATION_PROFILE_DIR',
+                                                DEFAULT_PROFILE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, time.strftime('%Y%m%d-%H%M%S'))
+        paths = []
+        with self.lock:
+            profiles = list(self.profiles)
+        if profiles:
+            import pstats
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(base + ".prof")
+            paths.append(base + ".prof")
+        self.write_chrome_trace(base + ".trace.json")
+        paths.append(base + ".trace.json")
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            f.write(self.format_summary() + "\n")
+        paths.append(base + ".txt")
+        return paths
+
+    def add_profile(self, profile):
+        with self.lock:
+            self.profiles.append(profile)
+
+
+recorder = Recorder()
+if os.environ.get('ARABIC_TRANSLATION_TRACE'):
+    recorder.enable()
+
+
+def span(name, **counts):
+    if not recorder.enabled:
+        return NULL_SPAN
+    return Span(recorder, name, counts)
+
+
+def record(name, seconds, **counts):
+    # For stages timed elsewhere (e.g. pages extracted in worker processes)
+    if recorder.enabled:
+        recorder.record(name, seconds, counts)
+
+
+def profiled(func):
+    # Runs func under its own cProfile.Profile while profiling is on
+    def run(*args, **kwargs):
+        if not recorder.profiling:
+            return func(*args, **kwargs)
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            profile.create_stats()
+            recorder.add_profile(profile)
+    return run
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class ThroughputMeter:
+    # Live rate and ETA for progress(done, total) callbacks. chars is the
+    # size of the whole job; chars/s assumes items of about the same size
+    def __init__(self, unit, chars=None):
+        self.unit = unit
+        self.chars = chars
+        self.first = None  # (time, done) of the first update
+
+    def status(self, label, done, total, chars=None):
+        chars = chars if chars is not None else self.chars
+        now = time.perf_counter()
+        if self.first is None:
+            # Items reused from the cache arrive at once; rates start here
+            self.first = (now, done)
+            return f"{label}... {done}/{total} {self.unit}"
+        elapsed = now - self.first[0]
+        rate = (done - self.first[1]) / elapsed if elapsed > 0 else 0.0
+        parts = [f"{label}... {done}/{total} {self.unit}", f"{rate:.1f} {self.unit}/s"]
+        if chars and total:
+            parts.append(f"{rate * chars / total:.0f} chars/s")
+        if rate > 0 and done < total:
+            parts.append(f"ETA {format_duration((total - done) / rate)}")
+        return ", ".join(parts)
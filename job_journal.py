@@ -0,0 +1,85 @@
+# Job journal for resumable translations
+#
+# Completed segments (lines or pages) are recorded per document as soon as
+# they come back from the backend. If a job crashes or is cancelled, the next
+# run of the same document skips everything already in the journal. A
+# document's entries are removed once its job finishes.
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".cache", "arabic_translation",
+                                    "journal.sqlite3")
+
+
+def document_id(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class JobJournal:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('ARABIC_TRANSLATION_JOURNAL', DEFAULT_JOURNAL_PATH)
+        self.lock = threading.Lock()
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS segments (
+                doc_id TEXT NOT NULL,
+                dest TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (doc_id, dest, idx)
+            )""")
+        self.conn.commit()
+
+    def open(self, doc_id):
+        return JournalEntry(self, doc_id)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class JournalEntry:
+    # The journal of a single document
+    def __init__(self, journal, doc_id):
+        self.journal = journal
+        self.doc_id = doc_id
+
+    def completed(self, dest):
+        # Returns {segment_index: translation}
+        with self.journal.lock:
+            rows = self.journal.conn.execute(
+                "SELECT idx, translation FROM segments WHERE doc_id = ? AND dest = ?",
+                (self.doc_id, dest)).fetchall()
+        return dict(rows)
+
+    def record(self, dest, items):
+        # items: iterable of (segment_index, translation)
+        rows = [(self.doc_id, dest, idx, translation) for idx, translation in items]
+        with self.journal.lock:
+            self.journal.conn.executemany(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?)", rows)
+            self.journal.conn.commit()
+
+    def finish(self):
+        with self.journal.lock:
+            self.journal.conn.execute("DELETE FROM segments WHERE doc_id = ?", (self.doc_id,))
+            self.journal.conn.commit()
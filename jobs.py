@@ -0,0 +1,116 @@
+# Background job scheduler for the Tk GUIs
+#
+# Jobs run on a thread pool. Workers never touch widgets: progress, results
+# and errors are queued and delivered on the Tk thread by polling the queue
+# with root.after, so the event loop is never re-entered.
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import profiled, span
+
+POLL_INTERVAL_MS = 16  # ~60fps
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, scheduler, name):
+        self.scheduler = scheduler
+        self.name = name
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def report_progress(self, percent, message=None):
+        # Called from the worker thread; also a convenient cancellation point
+        self.scheduler.events.put((self, 'progress', (percent, message)))
+        self.check_cancelled()
+
+
+class JobScheduler:
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.events = queue.Queue()
+        self.callbacks = {}
+        self.jobs = set()
+        self.root.after(POLL_INTERVAL_MS, self.poll)
+
+    def submit(self, name, func, *args, on_progress=None, on_done=None, on_error=None,
+               on_cancel=None):
+        # func runs in the pool as func(job, *args); callbacks run on the Tk thread
+        job = Job(self, name)
+        self.callbacks[job] = (on_progress, on_done, on_error, on_cancel)
+        self.jobs.add(job)
+        job.future = self.executor.submit(self.run, job, func, args)
+        return job
+
+    def run(self, job, func, args):
+        try:
+            job.check_cancelled()
+            # Runs under cProfile while profiling is switched on
+            with span('job.' + job.name):
+                result = profiled(func)(job, *args)
+            self.events.put((job, 'done', result))
+        except JobCancelled:
+            self.events.put((job, 'cancelled', None))
+        except Exception as e:
+            # Failures of a job that was already cancelled (e.g. its temporary
+            # files were removed) are reported as a cancellation
+            if job.cancelled:
+                self.events.put((job, 'cancelled', None))
+            else:
+                self.events.put((job, 'error', e))
+
+    def poll(self):
+        # Only the latest progress update of each job is applied per tick
+        latest_progress = {}
+        finished = []
+        try:
+            while True:
+                job, kind, payload = self.events.get_nowait()
+                if kind == 'progress':
+                    latest_progress[job] = payload
+                else:
+                    finished.append((job, kind, payload))
+        except queue.Empty:
+            pass
+
+        for job, (percent, message) in latest_progress.items():
+            on_progress = self.callbacks.get(job, (None,))[0]
+            if on_progress and not job.cancelled:
+                on_progress(percent, message)
+
+        for job, kind, payload in finished:
+            on_progress, on_done, on_error, on_cancel = self.callbacks.pop(job)
+            self.jobs.discard(job)
+            if kind == 'done' and on_done:
+                on_done(payload)
+            elif kind == 'error' and on_error:
+                on_error(payload)
+            elif kind == 'cancelled' and on_cancel:
+                on_cancel()
+
+        self.root.after(POLL_INTERVAL_MS, self.poll)
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,118 @@
+# Offline phrase-table translation backend
+#
+# Phrase tables are UTF-8 TSV files named <src>-<dest>.tsv with one
+# "source phrase<TAB>translation" pair per line. A table is memory-mapped and
+# indexed once, on first use, and shared by every backend instance in the
+# process. Table sources and input lines are split into the same tokens
+# (words and runs of punctuation), so "سنة." in a table matches "سنة." in
+# the text. Translation is a greedy longest-phrase match over the tokens of
+# each line; unknown tokens are passed through unchanged, and the spacing
+# of the input (e.g. no space before a comma) is kept.
+
+import mmap
+import os
+import re
+import threading
+
+from dedup import normalize_segment
+
+DEFAULT_TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrase_tables")
+
+_TOKEN = re.compile(r"\w+|[^\w\s]+", re.UNICODE)
+
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize_segment(text))
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+class PhraseTable:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        # source tokens joined by spaces -> (offset, length) of its translation
+        self.index = {}
+        self.max_words = 1
+
+        offset = 0
+        size = len(self.data)
+        while offset < size:
+            end = self.data.find(b"\n", offset)
+            if end == -1:
+                end = size
+            tab = self.data.find(b"\t", offset, end)
+            if tab != -1:
+                tokens = tokenize(self.data[offset:tab].decode('utf-8'))
+                if tokens:
+                    stop = end - 1 if end > tab + 1 and self.data[end - 1] == 0x0D else end
+                    self.index[" ".join(tokens)] = (tab + 1, stop - tab - 1)
+                    self.max_words = max(self.max_words, len(tokens))
+            offset = end + 1
+
+    def get(self, phrase):
+        location = self.index.get(phrase)
+        if location is None:
+            return None
+        start, length = location
+        return self.data[start:start + length].decode('utf-8')
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def load_table(path):
+    # Tables are loaded once per process and shared
+    with _tables_lock:
+        table = _tables.get(path)
+        if table is None:
+            table = PhraseTable(path)
+            _tables[path] = table
+        return table
+
+
+class PhraseTableBackend:
+    name = 'local'
+
+    def __init__(self, table_dir=None):
+        self.table_dir = table_dir or os.environ.get('ARABIC_TRANSLATION_PHRASE_TABLES',
+                                                     DEFAULT_TABLE_DIR)
+
+    def table(self, src, dest):
+        path = os.path.join(self.table_dir, f"{src}-{dest}.tsv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No phrase table for {src} -> {dest} at {path}")
+        return load_table(path)
+
+    def translate_line(self, table, line):
+        line = normalize_segment(line)
+        matches = list(_TOKEN.finditer(line))
+        tokens = [match.group() for match in matches]
+        output = []
+        i = 0
+        while i < len(tokens):
+            # The input's spacing before the token, "" or " "
+            if i:
+                output.append(line[matches[i - 1].end():matches[i].start()])
+            # Longest matching phrase starting at token i
+            for size in range(min(table.max_words, len(tokens) - i), 0, -1):
+                translation = table.get(" ".join(tokens[i:i + size]))
+                if translation is not None:
+                    output.append(translation)
+                    i += size
+                    break
+            else:
+                output.append(tokens[i])
+                i += 1
+        return "".join(output)
+
+    def translate(self, text, src, dest):
+        if not src or src == 'auto':
+            raise ValueError("The local backend needs an explicit source language")
+        table = self.table(src, dest)
+        return "\n".join(self.translate_line(table, line) for line in text.split("\n"))
@@ -0,0 +1,202 @@
+# OCR for scanned PDFs
+#
+# Pages whose text layer is empty (image-only scans) are rendered with
+# PyMuPDF and run through the Tesseract binary in a pool of worker
+# processes, while pages that have text pass straight through. Results are
+# cached in SQLite keyed by a digest of the page's content and image
+# streams (plus language, resolution and the engine with its version), so
+# re-opening the same scan, even under another file name, does not run OCR
+# again, while stub placeholders or output of an older Tesseract are not
+# reused.
+#
+# The engine is picked with ARABIC_TRANSLATION_OCR: 'tesseract' (default,
+# binary from ARABIC_TRANSLATION_TESSERACT or PATH) or 'stub', which
+# returns placeholder text without OCR for offline runs.
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+DEFAULT_OCR_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "arabic_translation",
+                                      "ocr.sqlite3")
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_DPI = 300
+MIN_TEXT_CHARS = 20
+ENGINES = ['tesseract', 'stub']
+
+# Translation language codes -> Tesseract traineddata names
+TESSERACT_LANGS = {
+    'ar': 'ara',
+    'de': 'deu',
+    'en': 'eng',
+    'es': 'spa',
+    'fr': 'fra',
+    'it': 'ita',
+    'la': 'lat',
+}
+
+
+def default_engine():
+    return os.environ.get('ARABIC_TRANSLATION_OCR', 'tesseract')
+
+
+def tesseract_path():
+    return os.environ.get('ARABIC_TRANSLATION_TESSERACT') or shutil.which('tesseract')
+
+
+def engine_available(engine=None):
+    engine = engine or default_engine()
+    return engine == 'stub' or (engine == 'tesseract' and tesseract_path() is not None)
+
+
+@lru_cache(maxsize=None)
+def tesseract_version(binary):
+    # First line of `tesseract --version`, e.g. "tesseract 5.3.0"
+    try:
+        result = subprocess.run([binary, "--version"], capture_output=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    output = (result.stdout or result.stderr).decode('utf-8', 'replace').strip()
+    return output.splitlines()[0] if output else None
+
+
+def engine_id(engine):
+    # Engine name plus version, part of the cache key
+    if engine == 'tesseract':
+        binary = tesseract_path()
+        return f"tesseract\0{binary and tesseract_version(binary)}"
+    return engine
+
+
+def page_key(digest, lang, dpi, engine):
+    return hashlib.sha256(f"{digest}\0{lang}\0{dpi}\0{engine_id(engine)}"
+                          .encode('utf-8')).hexdigest()
+
+
+def needs_ocr(text):
+    return len(text.strip()) < MIN_TEXT_CHARS
+
+
+def page_digest(doc, page):
+    # Hash of the raw page content and image streams; no rendering needed
+    digest = hashlib.sha256()
+    for xref in page.get_contents():
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+def ocr_image(png, lang, engine):
+    if engine == 'stub':
+        return f"[ocr {lang}] {hashlib.sha256(png).hexdigest()[:12]}"
+    if engine != 'tesseract':
+        raise ValueError(f"Unknown OCR engine: {engine}")
+    binary = tesseract_path()
+    if binary is None:
+        raise FileNotFoundError("Tesseract not found; install it or set ARABIC_TRANSLATION_TESSERACT")
+    result = subprocess.run([binary, "stdin", "stdout", "-l", TESSERACT_LANGS.get(lang, lang)],
+                            input=png, capture_output=True, check=True)
+    return result.stdout.decode('utf-8')
+
+
+def ocr_page(path, index, lang, dpi, engine):
+    # Runs in a worker process: renders one page and returns its OCR text
+    import fitz  # PyMuPDF
+    with fitz.open(path) as doc:
+        png = doc[index].get_pixmap(dpi=dpi).tobytes("png")
+    return ocr_image(png, lang, engine)
+
+
+class OcrCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or os.environ.get('ARABIC_TRANSLATION_OCR_CACHE', DEFAULT_OCR_CACHE_PATH)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT text FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE pages SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key, text):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                              (key, text, time.time()))
+            count = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute("""
+                    DELETE FROM pages WHERE key IN (
+                        SELECT key FROM pages ORDER BY last_used LIMIT ?
+                    )""", (count - self.max_entries,))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def ocr_pages(path, pages, lang, workers=None, engine=None, cache=None, dpi=DEFAULT_DPI):
+    # pages: iterable of (page_index, text) from pdf_extract.iter_pages.
+    # Yields (page_index, text) in page order, with image-only pages replaced
+    # by their (cached) OCR text. OCR runs in up to `workers` processes, a
+    # bounded number of pages ahead of the consumer.
+    import fitz  # PyMuPDF
+
+    engine = engine or default_engine()
+    cache = cache if cache is not None else OcrCache()
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+
+    def finish(index, text, key, future):
+        if future is not None:
+            text = future.result()
+            cache.put(key, text)
+        return index, text
+
+    with fitz.open(path) as doc, ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for index, text in pages:
+                key = future = None
+                if needs_ocr(text):
+                    key = page_key(page_digest(doc, doc[index]), lang, dpi, engine)
+                    cached = cache.get(key)
+                    if cached is not None:
+                        text = cached
+                    else:
+                        future = executor.submit(ocr_page, path, index, lang, dpi, engine)
+                pending.append((index, text, key, future))
+                # Pages with text are only held back behind pages still in OCR
+                while pending and (pending[0][3] is None or pending[0][3].done()
+                                   or len(pending) > workers * 2):
+                    yield finish(*pending.popleft())
+            while pending:
+                yield finish(*pending.popleft())
+        finally:
+            for _, _, _, future in pending:
+                if future is not None:
+                    future.cancel()
@@ -0,0 +1,232 @@
+# PDF export
+#
+# Text is drawn onto the canvas as it arrives, page by page, so a whole
+# document never has to be assembled in memory before writing starts.
+# Lines are wrapped to the page width in the same pass using word widths
+# computed from cached glyph metrics, and each page is emitted as a single
+# text object rather than one drawString call per line.
+#
+# Arabic lines are drawn right-aligned with a TrueType font that has Arabic
+# glyphs, registered once per process: ARABIC_TRANSLATION_PDF_FONT if set,
+# otherwise the first common system font found. Words are reshaped into
+# presentation forms (memoized) before they are measured and wrapped, and
+# each wrapped line is then reordered for display.
+
+import os
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from display_shaping import contains_arabic, reshape_word, visual_order
+from instrumentation import span
+
+ARABIC_FONT_PATHS = [
+    "C:\\Windows\\Fonts\\arial.ttf",
+    "C:\\Windows\\Fonts\\tahoma.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf",
+]
+PROGRESS_EVERY = 200
+
+# Compressed page streams are written as binary instead of ASCII85 text:
+# without reportlab's optional C accelerator, ASCII85 encoding in Python
+# took a third of the export time
+rl_config.useA85 = 0
+
+_registered = {}    # font path -> registered font name
+_glyph_widths = {}  # (font, size) -> {char: width}
+
+
+def find_arabic_font():
+    path = os.environ.get('ARABIC_TRANSLATION_PDF_FONT')
+    if path:
+        return path
+    for path in ARABIC_FONT_PATHS:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("No TrueType font with Arabic glyphs found; "
+                            "set ARABIC_TRANSLATION_PDF_FONT to a .ttf file")
+
+
+def register_font(path):
+    # Registers a TrueType font once per process and returns its name
+    name = _registered.get(path)
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+        pdfmetrics.registerFont(TTFont(name, path))
+        _registered[path] = name
+    return name
+
+
+def glyph_widths(font, size):
+    widths = _glyph_widths.get((font, size))
+    if widths is None:
+        widths = _glyph_widths[(font, size)] = {}
+    return widths
+
+
+def text_width(text, font, size, widths=None):
+    # Sum of cached per-glyph advance widths; reportlab does not kern
+    widths = widths if widths is not None else glyph_widths(font, size)
+    total = 0.0
+    for char in text:
+        width = widths.get(char)
+        if width is None:
+            width = widths[char] = pdfmetrics.stringWidth(char, font, size)
+        total += width
+    return total
+
+
+def wrap_words(words, word_widths, space_width, max_width):
+    # Greedy wrap; returns lists of words. Words wider than a line get a line
+    # of their own and are cut by the caller
+    lines = []
+    current = []
+    current_width = 0.0
+    for word, width in zip(words, word_widths):
+        if current and current_width + space_width + width > max_width:
+            lines.append(current)
+            current = []
+            current_width = 0.0
+        current_width += (space_width if current else 0.0) + width
+        current.append(word)
+    if current or not lines:
+        lines.append(current)
+    return lines
+
+
+class PdfTextWriter:
+    def __init__(self, path, pagesize=letter, font="Helvetica", font_size=12, leading=15,
+                 margin=50, arabic_font_path=None):
+        self.path = path
+        self.font = font
+        self.font_size = font_size
+        self.leading = leading
+        self.margin = margin
+        self.width, self.height = pagesize
+        self.max_width = self.width - 2 * margin
+        self.arabic_font_path = arabic_font_path
+        self.arabic_font = None
+        self.canvas = canvas.Canvas(path, pagesize=pagesize)
+        self.text = None
+        self.current_font = None
+        self.y_position = self.height - self.margin
+        self.page_started = False
+        # Word -> width, per font
+        self.word_widths = {}
+
+    def get_arabic_font(self):
+        if self.arabic_font is None:
+            self.arabic_font = register_font(self.arabic_font_path or find_arabic_font())
+        return self.arabic_font
+
+    def new_page(self):
+        self.flush_page()
+        self.canvas.showPage()
+        self.y_position = self.height - self.margin
+
+    def flush_page(self):
+        if self.text is not None:
+            self.canvas.drawText(self.text)
+            self.text = None
+
+    def measure_words(self, words, font):
+        cache = self.word_widths.setdefault(font, {})
+        widths = glyph_widths(font, self.font_size)
+        result = []
+        for word in words:
+            width = cache.get(word)
+            if width is None:
+                width = cache[word] = text_width(word, font, self.font_size, widths)
+            result.append(width)
+        return result
+
+    def wrap(self, words, font):
+        # Returns the text of each wrapped line, in logical order
+        if not words:
+            return [""]
+        widths = self.measure_words(words, font)
+        space = text_width(" ", font, self.font_size)
+        wrapped = []
+        word_widths = self.word_widths[font]
+        for line_words in wrap_words(words, widths, space, self.max_width):
+            if len(line_words) == 1 and word_widths[line_words[0]] > self.max_width:
+                wrapped.extend(self.cut(line_words[0], font))
+            else:
+                wrapped.append(" ".join(line_words))
+        return wrapped
+
+    def cut(self, word, font):
+        # Breaks a word wider than the line between characters
+        glyphs = glyph_widths(font, self.font_size)
+        pieces = []
+        start = 0
+        width = 0.0
+        for i, char in enumerate(word):
+            char_width = text_width(char, font, self.font_size, glyphs)
+            if i > start and width + char_width > self.max_width:
+                pieces.append(word[start:i])
+                start = i
+                width = 0.0
+            width += char_width
+        pieces.append(word[start:])
+        return pieces
+
+    def draw(self, text, font, right_aligned=False):
+        if self.text is None:
+            self.text = self.canvas.beginText()
+            self.current_font = None
+        if font != self.current_font:
+            self.text.setFont(font, self.font_size)
+            self.current_font = font
+        x = self.margin
+        if right_aligned:
+            x = self.width - self.margin - text_width(text, font, self.font_size)
+        self.text.setTextOrigin(x, self.y_position)
+        self.text.textOut(text)
+        self.page_started = True
+        self.y_position -= self.leading
+        if self.y_position < self.margin:
+            self.new_page()
+            self.page_started = False
+
+    def write_line(self, line):
+        words = line.split()
+        if contains_arabic(line):
+            font = self.get_arabic_font()
+            shaped_words = [reshape_word(word) for word in words]
+            for wrapped in self.wrap(shaped_words, font):
+                self.draw(visual_order(wrapped), font, right_aligned=True)
+        else:
+            for wrapped in self.wrap(words, self.font):
+                self.draw(wrapped, self.font)
+
+    def write_lines(self, lines, progress=None):
+        total = len(lines)
+        for start in range(0, total, PROGRESS_EVERY):
+            chunk = lines[start:start + PROGRESS_EVERY]
+            with span('pdf.write', lines=len(chunk), chars=sum(map(len, chunk))):
+                for line in chunk:
+                    self.write_line(line)
+            if progress:
+                progress(start + len(chunk), total)
+
+    def write_page(self, text):
+        # Each source page starts on a fresh output page
+        with span('pdf.write', pages=1, chars=len(text)):
+            if self.page_started:
+                self.new_page()
+                self.page_started = False
+            for line in text.splitlines():
+                self.write_line(line)
+
+    def save(self):
+        with span('pdf.save'):
+            self.flush_page()
+            self.canvas.save()
@@ -0,0 +1,113 @@
+# PDF text extraction
+#
+# Pages are yielded one at a time so callers can start translating the first
+# page before the rest of the document has been read. PyMuPDF (fitz) is used
+# when installed since it is much faster than the pure-Python PyPDF2. Large
+# documents are split into page ranges extracted in parallel by worker
+# processes, each opening its own document handle; pages are still yielded
+# in order, together with the time spent extracting each of them.
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentation import record
+
+BACKENDS = ['fitz', 'pypdf2']  # fastest first
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_TASK = 8
+
+
+def backend_available(backend):
+    try:
+        if backend == 'fitz':
+            import fitz  # noqa: F401
+        elif backend == 'pypdf2':
+            import PyPDF2  # noqa: F401
+        else:
+            return False
+    except ImportError:
+        return False
+    return True
+
+
+def default_backend():
+    for backend in BACKENDS:
+        if backend_available(backend):
+            return backend
+    raise ImportError("No PDF backend available, install PyMuPDF or PyPDF2")
+
+
+def page_count(path, backend=None):
+    backend = backend or default_backend()
+    if backend == 'fitz':
+        import fitz  # PyMuPDF
+        with fitz.open(path) as doc:
+            return doc.page_count
+    elif backend == 'pypdf2':
+        from PyPDF2 import PdfReader
+        return len(PdfReader(path).pages)
+    raise ValueError(f"Unknown PDF backend: {backend}")
+
+
+def extract_page_range(path, backend, start, stop):
+    # Runs in a worker process: returns [(page_index, text, seconds)]
+    results = []
+    if backend == 'fitz':
+        import fitz  # PyMuPDF
+        with fitz.open(path) as doc:
+            for i in range(start, stop):
+                began = time.perf_counter()
+                text = doc[i].get_text()
+                results.append((i, text, time.perf_counter() - began))
+    elif backend == 'pypdf2':
+        from PyPDF2 import PdfReader
+        reader = PdfReader(path)
+        for i in range(start, stop):
+            began = time.perf_counter()
+            text = reader.pages[i].extract_text() or ""
+            results.append((i, text, time.perf_counter() - began))
+    else:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    return results
+
+
+def iter_pages_timed(path, backend=None, workers=None):
+    # Yields (page_index, text, seconds) in page order. workers=None picks
+    # serial extraction for small documents and one process per CPU otherwise
+    backend = backend or default_backend()
+    total = page_count(path, backend)
+    if workers is None:
+        workers = 1 if total < PARALLEL_MIN_PAGES else (os.cpu_count() or 1)
+
+    if workers <= 1:
+        for start in range(0, total, PAGES_PER_TASK):
+            yield from recorded(extract_page_range(path, backend, start,
+                                                   min(total, start + PAGES_PER_TASK)))
+        return
+
+    # Keep a bounded number of page ranges in flight so memory stays flat
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start in range(0, total, PAGES_PER_TASK):
+            pending.append(executor.submit(extract_page_range, path, backend, start,
+                                           min(total, start + PAGES_PER_TASK)))
+            if len(pending) >= workers * 2:
+                yield from recorded(pending.popleft().result())
+        while pending:
+            yield from recorded(pending.popleft().result())
+
+
+def recorded(results):
+    # Pages may be extracted in worker processes, so their timings are
+    # recorded here rather than with spans
+    for index, text, seconds in results:
+        record('extract', seconds, pages=1, chars=len(text))
+    return results
+
+
+def iter_pages(path, backend=None, workers=None):
+    # Yields (page_index, text) in page order
+    for index, text, _ in iter_pages_timed(path, backend, workers):
+        yield index, text
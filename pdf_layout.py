@@ -0,0 +1,126 @@
+# Layout-preserving PDF translation
+#
+# Instead of writing the translation as a flat list of lines, every text
+# block of the original page is replaced in place: blocks are read with
+# their bounding boxes, all blocks of a page are sent to the translation
+# engine together (so they are batched into a few requests), and each
+# translation is laid out inside the rectangle of its block on a copy of the
+# original page. The source text is removed with a redaction that keeps
+# images and vector graphics, so scans, stamps, tables and rules stay where
+# they were. insert_htmlbox shapes Arabic, handles right-to-left text and
+# scales the text down until it fits the block.
+#
+# Every insert_htmlbox call embeds its own full copy of the fonts it uses
+# (about 1 MB per block for Noto Naskh Arabic and Charis SIL). Outputs are
+# therefore written in two steps: identical objects are merged first, which
+# leaves one copy of each font, and that copy is then subset to the glyphs
+# used, so a page costs kilobytes instead of megabytes.
+#
+# Pages are translated in parallel, a window ahead of the writer, and
+# copied to the output in page order as soon as they are done. Requires
+# PyMuPDF >= 1.23.
+
+import html
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import span
+from job_journal import document_id, file_digest
+
+DEFAULT_WINDOW = 4
+RTL_LANGUAGES = {'ar', 'fa', 'he', 'iw', 'ur', 'yi'}
+
+
+def page_blocks(page):
+    # [(rect, text)] for the text blocks of a page, with the lines wrapped
+    # inside a block joined back together
+    import fitz  # PyMuPDF
+    blocks = []
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks"):
+        text = " ".join(text.split())
+        if block_type == 0 and text:
+            blocks.append((fitz.Rect(x0, y0, x1, y1), text))
+    return blocks
+
+
+def block_html(text, dest):
+    direction = "rtl" if dest in RTL_LANGUAGES else "ltr"
+    return f'<div dir="{direction}">{html.escape(text)}</div>'
+
+
+def overlay_page(page, blocks, translations, dest, css=None):
+    # Replaces every block's text with its translation, in place
+    import fitz  # PyMuPDF
+    for rect, _ in blocks:
+        page.add_redact_annot(rect)
+    page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE,
+                          graphics=fitz.PDF_REDACT_LINE_ART_NONE)
+    for (rect, _), translation in zip(blocks, translations):
+        page.insert_htmlbox(rect, block_html(translation, dest), css=css, scale_low=0)
+
+
+def save_compact(output, path):
+    import fitz  # PyMuPDF
+    with fitz.open("pdf", output.tobytes(garbage=4, deflate=True)) as merged:
+        merged.subset_fonts()
+        merged.save(path, garbage=4, deflate=True)
+
+
+def translate_pdf_layout(in_path, out_paths, translator, src, progress=None, journal=None,
+                         dedup=None, window=DEFAULT_WINDOW, css=None):
+    # out_paths: {dest: output_pdf_path}; outputs are only saved on success.
+    # Same contract as pipeline.translate_pdf_file; with a JobJournal, pages
+    # translated by an interrupted run are not sent to the backend again.
+    import fitz  # PyMuPDF
+
+    dests = list(out_paths)
+    source = fitz.open(in_path)
+    total = source.page_count
+    outputs = {dest: fitz.open() for dest in dests}
+    digest = file_digest(in_path) if journal is not None else None
+    entries = []
+    executor = ThreadPoolExecutor(max_workers=window)
+    pending = deque()
+
+    def translate_page(texts, entry):
+        if not texts:
+            return {dest: [] for dest in dests}
+        return translator.translate_many(texts, src, dests, journal=entry, dedup=dedup)
+
+    def write(index, blocks, future):
+        translations = future.result()
+        for dest, output in outputs.items():
+            with span('pdf.layout_page', blocks=len(blocks)):
+                output.insert_pdf(source, from_page=index, to_page=index)
+                overlay_page(output[-1], blocks, translations[dest], dest, css)
+        if progress:
+            progress(index + 1, total)
+
+    try:
+        # PyMuPDF documents are not thread-safe: blocks are read and pages
+        # written on this thread, only the translation runs in the pool
+        for index in range(total):
+            blocks = page_blocks(source[index])
+            entry = None
+            if journal is not None:
+                entry = journal.open(document_id(digest, 'layout', str(index), src,
+                                                 *sorted(dests)))
+                entries.append(entry)
+            future = executor.submit(translate_page, [text for _, text in blocks], entry)
+            pending.append((index, blocks, future))
+            if len(pending) >= window:
+                write(*pending.popleft())
+        while pending:
+            write(*pending.popleft())
+
+        for dest, output in outputs.items():
+            save_compact(output, out_paths[dest])
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for output in outputs.values():
+            output.close()
+        source.close()
+
+    for entry in entries:
+        entry.finish()
+    return total
@@ -0,0 +1,94 @@
+# Streaming PDF translation pipeline
+#
+# extraction -> translation -> PDF writing, connected by generators. Only a
+# small window of pages is held in memory at any time, and the first
+# translated page is available as soon as it comes back from the backend.
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from job_journal import document_id, file_digest
+from ocr import default_engine as default_ocr_engine
+from ocr import ocr_pages
+from pdf_export import PdfTextWriter
+from pdf_extract import iter_pages, page_count
+
+DEFAULT_WINDOW = 4
+
+
+def translate_pages(pages, translator, src, dests, window=DEFAULT_WINDOW, journal=None,
+                    dedup=None, rewrap=False):
+    # pages: iterable of (page_index, text)
+    # Yields (page_index, text, {dest: translation}) in page order, with up to
+    # `window` pages being translated ahead of the consumer. Pages recorded in
+    # the journal by an interrupted run are not sent to the backend again, and
+    # a shared DedupIndex translates headers/footers repeated across pages once.
+    completed = {dest: journal.completed(dest) for dest in dests} if journal else {}
+    executor = ThreadPoolExecutor(max_workers=window)
+    pending = deque()
+
+    def record(index, future):
+        # Journal pages as soon as they finish, even if an earlier page failed
+        if not future.cancelled() and future.exception() is None:
+            translations = future.result()
+            for dest in dests:
+                journal.record(dest, [(index, translations[dest])])
+
+    def finish(index, text, future):
+        if future is None:
+            return index, text, {dest: completed[dest][index] for dest in dests}
+        return index, text, future.result()
+
+    try:
+        for index, text in pages:
+            if journal is not None and all(index in completed[dest] for dest in dests):
+                future = None
+            else:
+                future = executor.submit(translator.translate_text_many, text, src, dests,
+                                         dedup=dedup, rewrap=rewrap)
+                if journal is not None:
+                    future.add_done_callback(lambda f, index=index: record(index, f))
+            pending.append((index, text, future))
+            if len(pending) >= window:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def translate_pdf_file(in_path, out_paths, translator, src, progress=None,
+                       backend=None, journal=None, dedup=None, extract_workers=None, ocr=False,
+                       rewrap=False):
+    # out_paths: {dest: output_pdf_path}; outputs are only saved on success.
+    # With a JobJournal, an interrupted document resumes at the first page
+    # that was not translated yet. With ocr=True, pages without a text layer
+    # are OCRed in the source language; with rewrap=True, lines wrapped by
+    # the page width are joined before segmentation.
+    total = page_count(in_path, backend)
+    dests = list(out_paths)
+    writers = {dest: PdfTextWriter(path) for dest, path in out_paths.items()}
+    pages = iter_pages(in_path, backend, extract_workers)
+    ocr_engine = default_ocr_engine() if ocr else None
+    if ocr:
+        pages = ocr_pages(in_path, pages, src, workers=extract_workers, engine=ocr_engine)
+    entry = None
+    if journal is not None:
+        # Rewrapped or OCRed pages translate differently, so they are journaled
+        # apart: a run without OCR records empty scanned pages
+        parts = [src, *sorted(dests)] + (['rewrap'] if rewrap else [])
+        parts += ['ocr', ocr_engine] if ocr else []
+        entry = journal.open(document_id(file_digest(in_path), *parts))
+
+    for index, text, translations in translate_pages(pages, translator, src, dests,
+                                                     journal=entry, dedup=dedup, rewrap=rewrap):
+        for dest, writer in writers.items():
+            writer.write_page(translations[dest])
+        if progress:
+            progress(index + 1, total)
+
+    for writer in writers.values():
+        writer.save()
+    if entry is not None:
+        entry.finish()
+    return total
@@ -0,0 +1,51 @@
+# Rate limiting and retry helpers for translation backends
+
+import random
+import threading
+import time
+
+
+class ThrottledError(Exception):
+    # Raised by backends when the service asks us to slow down
+    pass
+
+
+def is_throttling_error(error):
+    if isinstance(error, ThrottledError):
+        return True
+    message = str(error)
+    return '429' in message or 'Too Many Requests' in message
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        # rate: tokens added per second, capacity: maximum burst size
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def call_with_backoff(func, *args, retries=5, base_delay=1.0, max_delay=30.0):
+    # Retry throttled calls with exponential backoff and jitter
+    for attempt in range(retries + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == retries or not is_throttling_error(e):
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            time.sleep(delay * random.uniform(0.5, 1.0))
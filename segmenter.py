@@ -0,0 +1,99 @@
+# Sentence-aware, length-bounded segmenter for Arabic and Latin-script text
+#
+# Every line of the input is a block of its own, so headers, footers and
+# typed line breaks stay where they are. Blocks are split into sentences
+# (and clauses when a sentence is too long), short fragments of the same
+# line are merged, and no segment is longer than max_chars. Each segment
+# remembers the separator that followed it (a space inside a line, the line
+# break and any blank lines after it), so translations can be reassembled
+# with the original layout.
+#
+# With rewrap=True, lines that do not end a sentence are joined to the next
+# line first, for text whose line breaks only come from the page width. This
+# is opt-in: it also merges headers into the sentence below them.
+
+import re
+from collections import namedtuple
+
+from instrumentation import span
+
+DEFAULT_MAX_CHARS = 1000
+DEFAULT_MIN_CHARS = 80
+
+SENTENCE_END = ".!?؟۔"
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?؟۔])\s+")
+_CLAUSE_SPLIT = re.compile(r"(?<=[،,؛;])\s+")
+
+Segment = namedtuple('Segment', ['text', 'end'])
+
+
+def split_blocks(text, rewrap=False):
+    # Returns [text, end] pairs; end is the separator that followed the block
+    blocks = []
+    current = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            if current:
+                blocks.append([" ".join(current), "\n"])
+                current = []
+            if blocks:
+                blocks[-1][1] += "\n"
+            continue
+        current.append(stripped)
+        if not rewrap or stripped[-1] in SENTENCE_END:
+            blocks.append([" ".join(current), "\n"])
+            current = []
+    if current:
+        blocks.append([" ".join(current), "\n"])
+    if blocks:
+        blocks[-1][1] = ""
+    return blocks
+
+
+def split_long(piece, max_chars):
+    # Break an oversized piece at clause punctuation, then whitespace, then hard
+    if len(piece) <= max_chars:
+        return [piece]
+    clauses = _CLAUSE_SPLIT.split(piece)
+    if len(clauses) > 1:
+        return [part for clause in clauses for part in split_long(clause, max_chars)]
+    cut = piece.rfind(" ", 0, max_chars + 1)
+    if cut <= 0:
+        cut = max_chars
+    return [piece[:cut].strip()] + split_long(piece[cut:].strip(), max_chars)
+
+
+def pack(pieces, max_chars, min_chars):
+    # Merge consecutive short pieces without exceeding max_chars
+    merged = []
+    current = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        if current and (len(current) >= min_chars or len(current) + 1 + len(piece) > max_chars):
+            merged.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        merged.append(current)
+    return merged
+
+
+def segment_text(text, max_chars=DEFAULT_MAX_CHARS, min_chars=DEFAULT_MIN_CHARS, rewrap=False):
+    segments = []
+    with span('segment', chars=len(text)) as timing:
+        for block, end in split_blocks(text, rewrap):
+            pieces = [part for sentence in _SENTENCE_SPLIT.split(block)
+                      for part in split_long(sentence, max_chars)]
+            packed = pack(pieces, max_chars, min_chars)
+            for i, piece in enumerate(packed):
+                segments.append(Segment(piece, end if i == len(packed) - 1 else " "))
+        timing.add(segments=len(segments))
+    return segments
+
+
+def join_segments(segments, translations):
+    return "".join(translation + segment.end
+                   for segment, translation in zip(segments, translations))
@@ -1,8 +1,8 @@
 # Import libraries
-import fitz  # PyMuPDF
-from googletrans import Translator
-import arabic_reshaper
-from bidi.algorithm import get_display
+from translation_engine import create_translator
+from pdf_extract import iter_pages
+from pipeline import translate_pages
+from display_shaping import shape_for_display
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
@@ -24,41 +24,32 @@ def translate_pdf():
             print(f"Error: File not found at {pdf_path}")
             return
 
-        # Open and extract text
-        doc = fitz.open(pdf_path)
-        arabic_text = ""
-        
-        for page in doc:
-            text = page.get_text()
-            arabic_text += text + "\n"
+        # Pages are extracted, translated and printed as a stream, so the
+        # first page is shown without waiting for the whole document
+        translator = create_translator()
+        pages = iter_pages(pdf_path)
 
-        # Reshape Arabic text
-        reshaped_text = arabic_reshaper.reshape(arabic_text)
-        bidi_text = get_display(reshaped_text)
+        # Both target languages are translated concurrently over the same text
+        for index, arabic_text, translations in translate_pages(pages, translator, 'ar', ['en', 'fr']):
+            # Reshape Arabic text for the console, line by line
+            bidi_text = shape_for_display(arabic_text)
 
-        # Print with encoding handling
-        print("Original Arabic Text (Reshaped for Display):".encode('utf-8').decode('utf-8'))
-        print(bidi_text.encode('utf-8').decode('utf-8'))
+            # Print with encoding handling
+            print(f"\n=== Page {index + 1} ===".encode('utf-8').decode('utf-8'))
+            print("Original Arabic Text (Reshaped for Display):".encode('utf-8').decode('utf-8'))
+            print(bidi_text.encode('utf-8').decode('utf-8'))
 
-        # Translate text
-        translator = Translator()
-        translation_en = translator.translate(arabic_text, src='ar', dest='en')
-        translation_fr = translator.translate(arabic_text, src='ar', dest='fr')
+            print("\nEnglish Translation:".encode('utf-8').decode('utf-8'))
+            print(translations['en'].encode('utf-8').decode('utf-8'))
 
-        print("\nEnglish Translation:".encode('utf-8').decode('utf-8'))
-        print(translation_en.text.encode('utf-8').decode('utf-8'))
+            print("\nFrench Translation:".encode('utf-8').decode('utf-8'))
+            print(translations['fr'].encode('utf-8').decode('utf-8'))
 
-        print("\nFrench Translation:".encode('utf-8').decode('utf-8'))
-        print(translation_fr.text.encode('utf-8').decode('utf-8'))
-        
     except UnicodeEncodeError as ue:
         print("Encoding error occurred. Try running in a terminal with UTF-8 support.")
         print(f"Error details: {str(ue)}")
     except Exception as e:
         print(f"An error occurred: {str(e)}")
-    finally:
-        if 'doc' in locals():
-            doc.close()
 
 if __name__ == "__main__":
     translate_pdf()
@@ -1,13 +1,10 @@
 import tkinter as tk
 from tkinter import scrolledtext, filedialog, messagebox, ttk
-from googletrans import Translator
-import arabic_reshaper
-from bidi.algorithm import get_display
+from translation_engine import create_translator
 import sys
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from pdf_export import PdfTextWriter
+from pdf_extract import iter_pages, page_count
 import os
-from PyPDF2 import PdfReader
 import os.path
 
 class TranslationApp:
@@ -100,7 +97,7 @@ class TranslationApp:
         self.create_styled_button(button_frame, "Reset", 
                                 self.reset)
 
-        self.translator = Translator()
+        self.translator = create_translator()
 
         # Add status bar
         self.status_bar = tk.Label(main_frame, 
@@ -150,17 +147,15 @@ class TranslationApp:
                 self.output_area.insert("1.0", "Please enter some text to translate")
                 return
 
-            # Split text into chunks for progress indication
-            chunks = text.split('\n')
-            total_chunks = len(chunks)
-            translated_text = ""
+            def update_progress(done, total):
+                self.progress['value'] = (done / total) * 100
+                self.root.update()
 
-            for i, chunk in enumerate(chunks):
-                if chunk.strip():
-                    translation = self.translator.translate(chunk, dest=target_lang)
-                    translated_text += translation.text + "\n"
-                    self.progress['value'] = ((i + 1) / total_chunks) * 100
-                    self.root.update()
+            # Lines are packed into batched requests by the translation engine
+            translated_text = self.translator.translate_text(text,
+                                                             src=None,
+                                                             dest=target_lang,
+                                                             progress=update_progress)
 
             self.output_area.delete("1.0", tk.END)
             self.output_area.insert("1.0", translated_text)
@@ -183,16 +178,17 @@ class TranslationApp:
                 self.status_bar['text'] = f"Loading {self.current_file}..."
                 self.root.update()
 
-                # Extract text from PDF
-                reader = PdfReader(file_path)
-                text = ""
-                total_pages = len(reader.pages)
-                
-                for i, page in enumerate(reader.pages):
-                    text += page.extract_text() + "\n"
+                # Extract text from PDF, one page at a time
+                total_pages = page_count(file_path)
+                pages = []
+
+                for i, page_text in iter_pages(file_path):
+                    pages.append(page_text + "\n")
                     self.progress['value'] = ((i + 1) / total_pages) * 100
                     self.root.update()
 
+                text = "".join(pages)
+
                 # Display extracted text
                 self.text_area.delete("1.0", tk.END)
                 self.text_area.insert("1.0", text)
@@ -227,28 +223,14 @@ class TranslationApp:
                 self.progress['value'] = 0
                 self.root.update()
 
-                # Create PDF using reportlab
-                pdf_canvas = canvas.Canvas(file_path, pagesize=letter)
-                pdf_canvas.setFont("Helvetica", 12)
-                width, height = letter
-                y_position = height - 50
-
-                lines = translation.splitlines()
-                total_lines = len(lines)
-
-                for i, line in enumerate(lines):
-                    pdf_canvas.drawString(50, y_position, line)
-                    y_position -= 15
-
-                    if y_position < 50:
-                        pdf_canvas.showPage()
-                        pdf_canvas.setFont("Helvetica", 12)
-                        y_position = height - 50
-
-                    self.progress['value'] = ((i + 1) / total_lines) * 100
+                def update_progress(done, total):
+                    self.progress['value'] = (done / total) * 100
                     self.root.update()
 
-                pdf_canvas.save()
+                # Create PDF using reportlab
+                writer = PdfTextWriter(file_path)
+                writer.write_lines(translation.splitlines(), progress=update_progress)
+                writer.save()
                 self.status_bar['text'] = "PDF saved successfully"
                 messagebox.showinfo("Success", f"PDF saved successfully as {os.path.basename(file_path)}")
                 
@@ -1,17 +1,22 @@
 import tkinter as tk
 from tkinter import scrolledtext, filedialog, messagebox, ttk
-from googletrans import Translator
-import arabic_reshaper
-from bidi.algorithm import get_display
-import sys
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from translation_engine import create_translator
+from jobs import JobScheduler
+from job_journal import JobJournal
+from document import Document
+from incremental import IncrementalTranslator
+from instrumentation import ThroughputMeter, recorder
+from document_view import DocumentView, VirtualText
+from dedup import DedupIndex
+from audio_cache import AudioCache
+from tts import Speech
 import os
-from PyPDF2 import PdfReader
 import os.path
-from gtts import gTTS
-import tempfile
-import pygame
+
+# reportlab, gTTS and pygame are slow to import and only needed for some
+# actions, so they are imported on first use to get the window up sooner
+
+AUDIO_POLL_MS = 50
 
 class ModificationWindow:
     def __init__(self, parent, text, callback):
@@ -57,9 +62,11 @@ class ModificationWindow:
         self.top.geometry(f'{width}x{height}+{x}+{y}')
         
     def validate(self):
-        modified_text = self.text_area.get("1.0", tk.END).strip()
-        self.callback(modified_text)
-        self.top.destroy()
+        # Not stripped: lines translated to nothing keep their place
+        modified_text = self.text_area.get("1.0", "end-1c")
+        # The callback returns False to keep the window open
+        if self.callback(modified_text) is not False:
+            self.top.destroy()
 
 class TranslationApp:
     def __init__(self, root):
@@ -153,8 +160,10 @@ class TranslationApp:
                                   fg=self.style['fg'])
         self.input_label.pack(anchor=tk.W)
 
-        self.text_area = scrolledtext.ScrolledText(
-            input_frame, 
+        # Large documents are kept in a line store and only the visible
+        # window is put into the Text widget
+        self.text_area = VirtualText(
+            input_frame,
             width=70,
             height=8,
             font=self.style['font'],
@@ -181,10 +190,13 @@ class TranslationApp:
                                    fg=self.style['fg'])
         self.output_label.pack(anchor=tk.W)
 
-        self.output_area = scrolledtext.ScrolledText(
-            output_frame, 
+        # Read-only: the translation lives in self.incremental.document and
+        # is edited through Modify Translation
+        self.output_area = VirtualText(
+            output_frame,
             width=70,
             height=8,
+            readonly=True,
             font=self.style['font'],
             bg=self.style['text_bg'],
             fg=self.style['text_fg'],
@@ -210,11 +222,22 @@ class TranslationApp:
         self.create_styled_button(button_frame, "Reset", self.reset)
         self.modify_btn = self.create_styled_button(button_frame, "Modify Translation", self.modify_translation)
         self.modify_btn.configure(state='disabled')  # Initially disabled
-
-        self.translator = Translator()
-
-        # Initialize pygame mixer for TTS
-        pygame.mixer.init()
+        self.create_styled_button(button_frame, "Side by Side", self.show_side_by_side)
+        self.create_styled_button(button_frame, "Cancel", self.cancel_job)
+
+        self.translator = create_translator()
+        self.journal = JobJournal()
+        self.incremental = IncrementalTranslator(self.translator)
+        self.loaded_document = None  # segments of the last loaded PDF, with page numbers
+
+        # Network and disk work runs in the background, off the Tk thread
+        self.scheduler = JobScheduler(root)
+        # One running job per action (translate, load_pdf, ...); starting an
+        # action again replaces its job, other actions keep running
+        self.jobs = {}
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # F9 starts and stops profiling (cProfile of jobs plus a Chrome trace)
+        self.root.bind('<F9>', self.toggle_profiling)
 
         # Add status bar
         self.status_bar = tk.Label(main_frame, 
@@ -240,8 +263,10 @@ class TranslationApp:
         self.current_audio_file = None
         self.is_playing = False
         self.volume = 0.5
-        pygame.mixer.init()
-        pygame.mixer.music.set_volume(self.volume)
+        self.speech = None
+        self.play_index = 0
+        # Synthesized chunks are cached on disk, so replays and saves are instant
+        self.audio_cache = AudioCache()
 
         # Audio controls frame
         audio_frame = tk.Frame(main_frame, bg=self.style['bg'])
@@ -289,135 +314,207 @@ class TranslationApp:
         btn.bind('<Leave>', on_leave)
         return btn
 
-    def translate_text(self, *args):
+    def start_job(self, name, func, *args, on_done=None, on_error=None):
+        # Run func(job, *args) in the background; the callbacks run on the Tk thread.
+        # The progress bar follows the most recently started job
+        previous = self.jobs.pop(name, None)
+        if previous:
+            previous.cancel()
+        self.progress['value'] = 0
+
+        def on_progress(percent, message):
+            if self.current_job() is job:
+                self.progress['value'] = percent
+                if message:
+                    self.status_bar['text'] = message
+
+        def finished(callback, result):
+            if self.jobs.get(name) is job:
+                del self.jobs[name]
+            if callback:
+                callback(result)
+
+        def on_cancel():
+            if self.jobs.get(name) is job:
+                del self.jobs[name]
+            elif name in self.jobs:
+                return  # replaced by a new job of the same action, which reports itself
+            if not self.jobs:
+                self.progress['value'] = 0
+            self.status_bar['text'] = f"Cancelled ({name.replace('_', ' ')})"
+
+        job = self.scheduler.submit(
+            name, func, *args,
+            on_progress=on_progress,
+            on_done=lambda result: finished(on_done, result),
+            on_error=lambda e: finished(on_error, e),
+            on_cancel=on_cancel)
+        self.jobs[name] = job
+        return job
+
+    def current_job(self):
+        return next(reversed(self.jobs.values()), None)
+
+    def cancel_job(self):
+        if self.jobs:
+            for job in self.jobs.values():
+                job.cancel()
+            self.status_bar['text'] = "Cancelling..."
+
+    def toggle_profiling(self, event=None):
+        if not recorder.profiling:
+            recorder.start_profiling()
+            self.status_bar['text'] = "Profiling - press F9 again to stop and save"
+            return
         try:
-            # Add language mapping
-            lang_map = {
-                'Arabic': 'ar',
-                'Deutsch': 'de',
-                'English': 'en',
-                'French': 'fr',
-                'Italian': 'it',
-                'Latin': 'la',
-                'Spanish': 'es'
-            }
-            
-            self.status_bar['text'] = "Translating..."
-            self.progress['value'] = 0
-            self.root.update()
-
-            text = self.text_area.get("1.0", tk.END).strip()
-            if not text:
-                self.output_area.delete("1.0", tk.END)
-                self.output_area.insert("1.0", "Please enter some text to translate")
-                return
+            paths = recorder.stop_profiling()
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save profile: {str(e)}")
+            return
+        self.status_bar['text'] = f"Profile saved to {os.path.dirname(paths[0])}"
+        messagebox.showinfo("Profile", recorder.format_summary() + "\n\n" + "\n".join(paths))
+
+    def on_close(self):
+        self.scheduler.shutdown()
+        self.stop_audio()
+        self.audio_cache.cleanup()
+        self.root.destroy()
 
-            source_lang = lang_map[self.source_lang_var.get()]
-            target_lang = lang_map[self.target_lang_var.get()]
-            
-            # If source language is auto, let Google detect it
-            if source_lang == 'auto':
-                source_lang = None
-
-            chunks = text.split('\n')
-            total_chunks = len(chunks)
-            translated_text = ""
-
-            for i, chunk in enumerate(chunks):
-                if chunk.strip():
-                    translation = self.translator.translate(chunk, 
-                                                         dest=target_lang,
-                                                         src=source_lang)
-                    translated_text += translation.text + "\n"
-                    self.progress['value'] = ((i + 1) / total_chunks) * 100
-                    self.root.update()
-
-            self.output_area.delete("1.0", tk.END)
-            self.output_area.insert("1.0", translated_text)
-            self.status_bar['text'] = f"Translation completed"
+    def translate_text(self, *args):
+        # Add language mapping
+        lang_map = {
+            'Arabic': 'ar',
+            'Deutsch': 'de',
+            'English': 'en',
+            'French': 'fr',
+            'Italian': 'it',
+            'Latin': 'la',
+            'Spanish': 'es'
+        }
+
+        text = self.text_area.get_text().strip()
+        if not text:
+            self.output_area.set_text("Please enter some text to translate")
+            return
+
+        source_lang = lang_map[self.source_lang_var.get()]
+        target_lang = lang_map[self.target_lang_var.get()]
+
+        # If source language is auto, let Google detect it
+        if source_lang == 'auto':
+            source_lang = None
+
+        # An unedited PDF keeps the page numbers of its segments
+        source = text
+        if self.loaded_document is not None and text == self.loaded_document.source_text().strip():
+            source = self.loaded_document
+
+        self.status_bar['text'] = "Translating..."
+        meter = ThroughputMeter("segments")
+
+        def work(job):
+            def update_progress(done, total):
+                job.report_progress((done / total) * 100,
+                                    meter.status("Translating", done, total,
+                                                 self.incremental.pending_chars))
+
+            # Only segments that changed since the last translation are sent;
+            # they are packed into batched requests by the translation engine,
+            # repeated segments are only translated once, and segments finished
+            # by an interrupted run are resumed from the journal
+            dedup = DedupIndex()
+            translated_text, changed = self.incremental.translate(source,
+                                                                  src=source_lang,
+                                                                  dest=target_lang,
+                                                                  progress=update_progress,
+                                                                  journal=self.journal,
+                                                                  dedup=dedup)
+            return translated_text, changed, dedup
+
+        def on_done(result):
+            translated_text, changed, dedup = result
+            self.replace_output(translated_text)
+            self.progress['value'] = 100
+            self.status_bar['text'] = (f"Translation completed - {changed} segment(s) translated, "
+                                       f"{dedup.total - dedup.unique} duplicate(s) reused")
             self.modify_btn.configure(state='normal')  # Enable modify button after translation
-            
-        except Exception as e:
-            self.status_bar['text'] = "Translation error"
-            self.output_area.delete("1.0", tk.END)
-            self.output_area.insert("1.0", f"An error occurred: {str(e)}")
+
+        def on_error(e):
+            self.status_bar['text'] = "Translation error - click Translate to resume"
+            self.output_area.set_text(f"An error occurred: {str(e)}\n"
+                                      "Translated lines were kept; click Translate to resume.")
             self.modify_btn.configure(state='disabled')
 
+        self.start_job("translate", work, on_done=on_done, on_error=on_error)
+
+    def replace_output(self, new_text):
+        # Only redraws the output window if the changed lines are visible
+        self.output_area.set_text(new_text, keep_position=True)
+
+    def show_side_by_side(self):
+        pairs = self.incremental.document.blocks()
+        if not pairs:
+            messagebox.showwarning("Warning", "Translate some text first")
+            return
+        top = tk.Toplevel(self.root)
+        top.title("Source and Translation")
+        top.geometry("1100x700")
+        view = DocumentView(top,
+                            font=self.style['font'],
+                            bg=self.style['text_bg'],
+                            fg=self.style['text_fg'],
+                            padx=10,
+                            pady=5)
+        view.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        view.set_pairs(pairs)
+
+    def mixer(self):
+        # The pygame mixer is started on first playback, on the Tk thread
+        import pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+            pygame.mixer.music.set_volume(self.volume)
+        return pygame.mixer
+
     def toggle_play(self):
         if self.current_audio_file:
             if self.is_playing:
-                pygame.mixer.music.pause()
+                self.mixer().music.pause()
                 self.play_btn.configure(text="▶")
             else:
-                pygame.mixer.music.unpause()
+                self.mixer().music.unpause()
                 self.play_btn.configure(text="⏸")
             self.is_playing = not self.is_playing
 
     def volume_up(self):
         if self.volume < 1.0:
             self.volume = min(1.0, self.volume + 0.1)
-            pygame.mixer.music.set_volume(self.volume)
+            if self.current_audio_file:
+                self.mixer().music.set_volume(self.volume)
             self.vol_label.configure(text=f"Volume: {int(self.volume * 100)}%")
 
     def volume_down(self):
         if self.volume > 0.0:
             self.volume = max(0.0, self.volume - 0.1)
-            pygame.mixer.music.set_volume(self.volume)
+            if self.current_audio_file:
+                self.mixer().music.set_volume(self.volume)
             self.vol_label.configure(text=f"Volume: {int(self.volume * 100)}%")
 
     def save_audio(self):
-        try:
-            text = self.output_area.get("1.0", tk.END).strip()
-            if not text:
-                messagebox.showwarning("Warning", "No text to save as audio")
-                return
-            
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".mp3",
-                filetypes=[("MP3 files", "*.mp3")],
-                initialfile="translation.mp3"
-            )
-            
-            if file_path:
-                self.status_bar['text'] = "Generating audio file..."
-                self.root.update()
-                
-                lang_map = {
-                    'Arabic': 'ar',
-                    'Deutsch': 'de',
-                    'English': 'en',
-                    'French': 'fr',
-                    'Italian': 'it',
-                    'Latin': 'la',
-                    'Spanish': 'es'
-                }
-                
-                lang = lang_map[self.target_lang_var.get()]
-                tts = gTTS(text=text, lang=lang)
-                tts.save(file_path)
-                
-                self.status_bar['text'] = "Audio saved successfully"
-                messagebox.showinfo("Success", "Audio file saved successfully!")
-        
-        except Exception as e:
-            self.status_bar['text'] = "Error saving audio"
-            messagebox.showerror("Error", f"Failed to save audio: {str(e)}")
+        text = self.incremental.document.translated_text().strip()
+        if not text:
+            messagebox.showwarning("Warning", "No text to save as audio")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".mp3",
+            filetypes=[("MP3 files", "*.mp3")],
+            initialfile="translation.mp3"
+        )
+
+        if file_path:
+            self.status_bar['text'] = "Generating audio file..."
 
-    def speak_text(self):
-        try:
-            text = self.output_area.get("1.0", tk.END).strip()
-            if not text:
-                messagebox.showwarning("Warning", "No text to read")
-                return
-                
-            self.status_bar['text'] = "Preparing speech..."
-            self.root.update()
-            
-            # Create temporary file for the audio
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_path = temp_file.name
-            
-            # Detect language from the target language combobox
             lang_map = {
                 'Arabic': 'ar',
                 'Deutsch': 'de',
@@ -427,145 +524,263 @@ class TranslationApp:
                 'Latin': 'la',
                 'Spanish': 'es'
             }
-            
+
             lang = lang_map[self.target_lang_var.get()]
-            
-            # Generate speech
-            tts = gTTS(text=text, lang=lang)
-            tts.save(temp_path)
-            
-            # Update current audio file
-            self.current_audio_file = temp_path
-            self.is_playing = True
-            self.play_btn.configure(text="⏸")
-            
-            # Play the audio
-            self.status_bar['text'] = "Reading text..."
-            self.root.update()
-            
-            pygame.mixer.music.load(temp_path)
-            pygame.mixer.music.play()
-            
-            # Don't wait for playback to finish anymore
+
+            # Chunks already synthesized (e.g. by Read Text) come from the
+            # audio cache; with the speech being read aloud, chunks it is
+            # still synthesizing are waited for instead of synthesized again
+            speech = self.speech
+            if speech is None or speech.text != text or speech.lang != lang:
+                speech = Speech(text, lang, self.audio_cache)
+
+            meter = ThroughputMeter("chunks", chars=len(text))
+
+            def work(job):
+                def update_progress(done, total):
+                    job.report_progress((done / total) * 100,
+                                        meter.status("Generating audio", done, total))
+
+                speech.synthesize(progress=update_progress)
+                speech.save(file_path)
+
+            def on_done(result):
+                self.status_bar['text'] = "Audio saved successfully"
+                messagebox.showinfo("Success", "Audio file saved successfully!")
+
+            def on_error(e):
+                self.status_bar['text'] = "Error saving audio"
+                messagebox.showerror("Error", f"Failed to save audio: {str(e)}")
+
+            self.start_job("save_audio", work, on_done=on_done, on_error=on_error)
+
+    def speak_text(self):
+        text = self.incremental.document.translated_text().strip()
+        if not text:
+            messagebox.showwarning("Warning", "No text to read")
+            return
+
+        self.status_bar['text'] = "Preparing speech..."
+
+        # Detect language from the target language combobox
+        lang_map = {
+            'Arabic': 'ar',
+            'Deutsch': 'de',
+            'English': 'en',
+            'French': 'fr',
+            'Italian': 'it',
+            'Latin': 'la',
+            'Spanish': 'es'
+        }
+
+        lang = lang_map[self.target_lang_var.get()]
+
+        # Chunks are synthesized in the background and played in order as
+        # they become ready, so reading starts after the first sentence
+        self.stop_audio()
+        speech = Speech(text, lang, self.audio_cache)
+        self.speech = speech
+        self.play_index = 0
+        self.is_playing = True
+        self.play_btn.configure(text="⏸")
+        self.play_queued_audio(speech)
+
+        meter = ThroughputMeter("chunks", chars=len(text))
+
+        def work(job):
+            def update_progress(done, total):
+                job.report_progress((done / total) * 100,
+                                    meter.status("Preparing speech", done, total))
+
+            speech.synthesize(progress=update_progress)
+
+        def on_done(result):
             self.status_bar['text'] = "Ready"
-            
-        except Exception as e:
+
+        def on_error(e):
             self.status_bar['text'] = "Error reading text"
             messagebox.showerror("Error", f"Failed to read text: {str(e)}")
 
+        self.start_job("speak", work, on_done=on_done, on_error=on_error)
+
+    def play_queued_audio(self, speech):
+        # Polls for the next synthesized chunk; pygame is only driven from
+        # the Tk thread
+        if speech is not self.speech or self.play_index >= len(speech.chunks):
+            return
+        if self.is_playing:
+            try:
+                mixer = self.mixer()
+                if not mixer.music.get_busy():
+                    path = speech.ready_path(self.play_index)
+                    if path is not None:
+                        mixer.music.load(path)
+                        mixer.music.play()
+                        self.current_audio_file = path
+                        self.play_index += 1
+            except Exception as e:
+                self.stop_audio()
+                self.status_bar['text'] = "Error reading text"
+                messagebox.showerror("Error", f"Failed to read text: {str(e)}")
+                return
+        self.root.after(AUDIO_POLL_MS, self.play_queued_audio, speech)
+
+    def stop_audio(self):
+        if self.current_audio_file:
+            mixer = self.mixer()
+            mixer.music.stop()
+            mixer.music.unload()  # Unload the music file first
+            self.current_audio_file = None
+        self.is_playing = False
+        self.play_btn.configure(text="▶")
+        self.speech = None
+
     def load_pdf(self):
-        try:
-            file_path = filedialog.askopenfilename(
-                filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
-            )
-            if file_path:
-                self.current_file = os.path.basename(file_path)
-                self.progress['value'] = 0
-                self.status_bar['text'] = f"Loading {self.current_file}..."
-                self.root.update()
-
-                # Extract text from PDF
-                reader = PdfReader(file_path)
-                text = ""
-                total_pages = len(reader.pages)
-                
-                for i, page in enumerate(reader.pages):
-                    text += page.extract_text() + "\n"
-                    self.progress['value'] = ((i + 1) / total_pages) * 100
-                    self.root.update()
+        file_path = filedialog.askopenfilename(
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.current_file = os.path.basename(file_path)
+            self.status_bar['text'] = f"Loading {self.current_file}..."
 
+            lang_map = {
+                'Arabic': 'ar',
+                'Deutsch': 'de',
+                'English': 'en',
+                'French': 'fr',
+                'Italian': 'it',
+                'Latin': 'la',
+                'Spanish': 'es'
+            }
+
+            source_lang = lang_map[self.source_lang_var.get()]
+
+            def work(job):
+                from ocr import engine_available, needs_ocr, ocr_pages
+                from pdf_extract import backend_available, iter_pages, page_count
+
+                # Extract text from PDF, one page at a time; scanned pages
+                # without a text layer are OCRed in worker processes
+                total_pages = page_count(file_path)
+                pages = iter_pages(file_path)
+                ocr = engine_available() and backend_available('fitz')
+                if ocr:
+                    pages = ocr_pages(file_path, pages, source_lang)
+                document = Document()
+                missing = 0
+                meter = ThroughputMeter("pages")
+
+                for i, page_text in pages:
+                    document.add_page(i, page_text)
+                    missing += needs_ocr(page_text)
+                    job.report_progress(((i + 1) / total_pages) * 100,
+                                        meter.status("Loading", i + 1, total_pages))
+
+                return document, missing, ocr
+
+            def on_done(result):
+                document, missing, ocr = result
                 # Display extracted text
-                self.text_area.delete("1.0", tk.END)
-                self.text_area.insert("1.0", text)
-                
-                self.status_bar['text'] = f"Successfully loaded {self.current_file}"
+                self.loaded_document = document
+                self.text_area.set_text(document.source_text())
+
+                if missing and not ocr:
+                    self.status_bar['text'] = (f"{missing} page(s) of {self.current_file} have no "
+                                               "text layer; install Tesseract to OCR them")
+                else:
+                    self.status_bar['text'] = f"Successfully loaded {self.current_file}"
                 messagebox.showinfo("Success", f"PDF '{self.current_file}' loaded successfully!")
-                
-        except Exception as e:
-            self.status_bar['text'] = "Error loading PDF"
-            messagebox.showerror("Error", f"Failed to load PDF: {str(e)}")
-
-    def save_as_pdf(self):
-        try:
-            translation = self.output_area.get("1.0", tk.END).strip()
-            if not translation:
-                messagebox.showwarning("Warning", "No translation to save")
-                return
 
-            suggested_name = ""
-            if self.current_file:
-                base_name = os.path.splitext(self.current_file)[0]
-                suggested_name = f"{base_name}_translated.pdf"
+            def on_error(e):
+                self.status_bar['text'] = "Error loading PDF"
+                messagebox.showerror("Error", f"Failed to load PDF: {str(e)}")
 
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf")],
-                initialfile=suggested_name
-            )
-            
-            if file_path:
-                self.status_bar['text'] = "Saving PDF..."
-                self.progress['value'] = 0
-                self.root.update()
+            self.start_job("load_pdf", work, on_done=on_done, on_error=on_error)
 
-                # Create PDF using reportlab
-                pdf_canvas = canvas.Canvas(file_path, pagesize=letter)
-                pdf_canvas.setFont("Helvetica", 12)
-                width, height = letter
-                y_position = height - 50
+    def save_as_pdf(self):
+        lines = self.incremental.document.translation_lines()
+        if not any(line.strip() for line in lines):
+            messagebox.showwarning("Warning", "No translation to save")
+            return
+
+        suggested_name = ""
+        if self.current_file:
+            base_name = os.path.splitext(self.current_file)[0]
+            suggested_name = f"{base_name}_translated.pdf"
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf")],
+            initialfile=suggested_name
+        )
 
-                lines = translation.splitlines()
-                total_lines = len(lines)
+        if file_path:
+            self.status_bar['text'] = "Saving PDF..."
 
-                for i, line in enumerate(lines):
-                    pdf_canvas.drawString(50, y_position, line)
-                    y_position -= 15
+            meter = ThroughputMeter("lines", chars=sum(map(len, lines)))
 
-                    if y_position < 50:
-                        pdf_canvas.showPage()
-                        pdf_canvas.setFont("Helvetica", 12)
-                        y_position = height - 50
+            def work(job):
+                def update_progress(done, total):
+                    job.report_progress((done / total) * 100,
+                                        meter.status("Saving PDF", done, total))
 
-                    self.progress['value'] = ((i + 1) / total_lines) * 100
-                    self.root.update()
+                # Create PDF using reportlab
+                from pdf_export import PdfTextWriter
+                writer = PdfTextWriter(file_path)
+                writer.write_lines(lines, progress=update_progress)
+                writer.save()
 
-                pdf_canvas.save()
+            def on_done(result):
                 self.status_bar['text'] = "PDF saved successfully"
                 messagebox.showinfo("Success", f"PDF saved successfully as {os.path.basename(file_path)}")
-                
-        except Exception as e:
-            self.status_bar['text'] = "Error saving PDF"
-            messagebox.showerror("Error", f"Failed to save PDF: {str(e)}")
+
+            def on_error(e):
+                self.status_bar['text'] = "Error saving PDF"
+                messagebox.showerror("Error", f"Failed to save PDF: {str(e)}")
+
+            self.start_job("save_pdf", work, on_done=on_done, on_error=on_error)
 
     def modify_translation(self):
-        current_text = self.output_area.get("1.0", tk.END).strip()
-        if current_text:
+        current_text = self.incremental.document.translated_text()
+        if current_text.strip():
             ModificationWindow(self.root, current_text, self.update_translation)
 
     def update_translation(self, modified_text):
-        self.output_area.delete("1.0", tk.END)
-        self.output_area.insert("1.0", modified_text)
-        self.status_bar['text'] = "Translation modified"
+        # Edits are stored on the document's segments, so the next
+        # translation, PDF export and speech all use them. Accepted
+        # corrections also go into the translation memory for later reuse
+        document = self.incremental.document
+        edits = document.apply_edits(modified_text)
+        if edits is None:
+            messagebox.showwarning("Warning", "Keep one line per translated line when modifying "
+                                              "the translation")
+            return False
+        if edits and self.translator.memory is not None:
+            # Written from the job pool so a busy memory never holds up the UI
+            memory, backend = self.translator.memory, self.translator.backend.name
+
+            def work(job):
+                memory.add_many(edits, document.src, document.dest, backend)
+
+            def on_error(e):
+                self.status_bar['text'] = "Error storing edits in the translation memory"
+
+            self.scheduler.submit("remember_edits", work, on_error=on_error)
+
+        self.replace_output(document.translated_text())
+        self.status_bar['text'] = f"Translation modified - {len(edits)} line(s) changed"
 
     def reset(self):
-        self.text_area.delete("1.0", tk.END)
-        self.output_area.delete("1.0", tk.END)
+        self.text_area.clear()
+        self.output_area.clear()
         self.current_file = None
+        self.loaded_document = None
+        self.cancel_job()
+        self.incremental.reset()
         self.progress['value'] = 0
         self.status_bar['text'] = "Ready"
         self.modify_btn.configure(state='disabled')  # Disable modify button on reset
-        if self.current_audio_file:
-            pygame.mixer.music.stop()
-            pygame.mixer.music.unload()  # Unload the music file first
-            self.is_playing = False
-            self.play_btn.configure(text="▶")
-            try:
-                if os.path.exists(self.current_audio_file):
-                    os.unlink(self.current_audio_file)
-            except PermissionError:
-                # If file is still locked, we'll just ignore the error
-                pass
-            self.current_audio_file = None
+        self.stop_audio()
 
 if __name__ == "__main__":
     # sys.stdout.reconfigure(encoding='utf-8')  # Not needed for .exe
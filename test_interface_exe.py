@@ -1,8 +1,6 @@
 import tkinter as tk
 from tkinter import scrolledtext
-from googletrans import Translator
-import arabic_reshaper
-from bidi.algorithm import get_display
+from translation_engine import create_translator
 import sys
 
 class TranslationApp:
@@ -41,7 +39,7 @@ class TranslationApp:
         self.reset_btn = tk.Button(button_frame, text="Reset", command=self.reset)
         self.reset_btn.pack(side=tk.LEFT, padx=5)
 
-        self.translator = Translator()
+        self.translator = create_translator()
 
     def translate_text(self, target_lang):
         try:
@@ -51,14 +49,10 @@ class TranslationApp:
                 self.output_area.insert("1.0", "Please enter some text to translate")
                 return
 
-            # Reshape Arabic text for display
-            reshaped_text = arabic_reshaper.reshape(arabic_text)
-            bidi_text = get_display(reshaped_text)
-
             # Translate
-            translation = self.translator.translate(arabic_text, src='ar', dest=target_lang)
+            translation = self.translator.translate_text(arabic_text, src='ar', dest=target_lang)
             self.output_area.delete("1.0", tk.END)
-            self.output_area.insert("1.0", translation.text)
+            self.output_area.insert("1.0", translation)
 
         except Exception as e:
             self.output_area.delete("1.0", tk.END)
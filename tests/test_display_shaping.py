@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip('arabic_reshaper')
+pytest.importorskip('bidi')
+
+from display_shaping import clear_cache, shape_for_display
+
+
+def test_brackets_are_mirrored_in_right_to_left_runs():
+    clear_cache()
+    assert shape_for_display("العام ١٩٥٤ (سنة)") == "(ﺔﻨﺳ) ١٩٥٤ ﻡﺎﻌﻟﺍ"
+    assert shape_for_display("سنة [x] «نص»") == "«ﺺﻧ» [x] ﺔﻨﺳ"
+
+
+def test_brackets_in_left_to_right_runs_are_kept():
+    clear_cache()
+    assert shape_for_display("hello (world) سنة") == "hello (world) ﺔﻨﺳ"
+    assert shape_for_display("plain (text)") == "plain (text)"
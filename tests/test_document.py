@@ -0,0 +1,52 @@
+from document import EDITED, Document
+
+# Two sentences long enough to be segments of their own
+LINE = ("The first sentence of the record is long enough to be translated as a segment of "
+        "its own. The second sentence follows it and is also long enough to stand alone here.")
+
+
+def translated(text, translate):
+    document = Document.from_text(text)
+    document.set_translations(range(len(document)), [translate(segment.source)
+                                                     for segment in document])
+    return document
+
+
+def test_translated_pieces_skip_segments_emptied_inside_a_line():
+    document = translated(LINE + "\nNext line.", str.upper)
+    assert len(document) == 3
+    document.segments[0].translation = ""
+    assert list(document.translated_pieces()) == [
+        ("THE SECOND SENTENCE FOLLOWS IT AND IS ALSO LONG ENOUGH TO STAND ALONE HERE.", "\n"),
+        ("NEXT LINE.", "")]
+
+
+def test_translation_lines_keep_blank_lines_and_empty_translations():
+    document = translated("Title\n***\n\nBody line.", lambda source: "" if source == "***"
+                          else source.upper())
+    assert document.translation_lines() == ["TITLE", "", "", "BODY LINE."]
+    assert document.translated_text() == "TITLE\n\n\nBODY LINE."
+
+
+def test_apply_edits_with_a_line_translated_to_nothing():
+    document = translated("Title\n***\n\nBody line.", lambda source: "" if source == "***"
+                          else source.upper())
+    edits = document.apply_edits("TITLE\n\n\nEDITED BODY.\n")
+    assert edits == [("Body line.", "EDITED BODY.")]
+    assert document.segments[-1].translation == "EDITED BODY."
+    assert document.segments[-1].status == EDITED
+    assert document.translated_text() == "TITLE\n\n\nEDITED BODY."
+
+
+def test_apply_edits_keeps_a_line_of_several_segments_together():
+    document = translated(LINE + "\nNext line.", str.upper)
+    assert document.apply_edits("One line now.\nNEXT LINE.") == [(LINE, "One line now.")]
+    assert [segment.translation for segment in document] == ["", "One line now.", "NEXT LINE."]
+    assert document.translation_lines() == ["One line now.", "NEXT LINE."]
+
+
+def test_apply_edits_rejects_lines_that_no_longer_line_up():
+    document = translated("Title\n\nBody line.", str.upper)
+    assert document.apply_edits("TITLE\nBODY LINE.") is None
+    assert document.apply_edits("TITLE\nextra\nBODY LINE.") is None
+    assert document.apply_edits("TITLE\n\nBODY LINE.\nextra") is None
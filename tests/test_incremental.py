@@ -0,0 +1,23 @@
+from incremental import IncrementalTranslator, splice_range
+from translation_engine import BatchTranslator, StubBackend
+
+
+def test_splice_range():
+    assert splice_range(list("abcdef"), list("abXdef")) == (2, 3, 3)
+    assert splice_range(list("abc"), list("abc")) == (3, 3, 3)
+    assert splice_range(list("aaa"), list("aaaa")) == (3, 3, 4)
+
+
+def test_only_changed_segments_are_sent_again():
+    backend = StubBackend()
+    incremental = IncrementalTranslator(BatchTranslator(backend))
+    pages = [f"Header\nLine {i} of the report.\nFooter" for i in range(50)]
+    incremental.translate("\n".join(pages), 'ar', 'en')
+    pages[20] = "Header\nAn edited line.\nFooter"
+    pages.insert(30, "A new line.")
+    text, sent = incremental.translate("\n".join(pages), 'ar', 'en')
+    assert sent == 2
+    lines = text.split("\n")
+    assert lines[61] == "[en] An edited line."
+    assert lines[90] == "[en] A new line."
+    assert lines[-2] == "[en] Line 49 of the report."
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from job_journal import JobJournal
+from translation_engine import BatchTranslator, StubBackend
+
+
+class FailingBackend(StubBackend):
+    # Records every request and fails the first one containing `failing`
+    def __init__(self, failing=None):
+        super().__init__()
+        self.failing = failing
+        self.texts = []
+
+    def translate(self, text, src, dest):
+        self.texts.append(text)
+        if self.failing is not None and self.failing in text:
+            self.failing = None
+            time.sleep(0.05)  # completes after the batches sent before it
+            raise RuntimeError("connection reset")
+        return super().translate(text, src, dest)
+
+
+def test_interrupted_lines_are_not_sent_again():
+    lines = [f"سطر رقم {i}" for i in range(6)]
+    entry = JobJournal(':memory:').open("document")
+    backend = FailingBackend(failing=lines[4])
+    with pytest.raises(RuntimeError):
+        BatchTranslator(backend, max_lines=2).translate_lines(lines, 'ar', 'en', journal=entry)
+    assert sorted(entry.completed('en')) == [0, 1, 2, 3]
+
+    backend = FailingBackend()
+    translated = BatchTranslator(backend, max_lines=2).translate_lines(lines, 'ar', 'en',
+                                                                     journal=entry)
+    assert backend.texts == ["\n".join(lines[4:])]
+    assert translated == [f"[en] {line}" for line in lines]
+
+
+def test_finish_clears_the_document():
+    journal = JobJournal(':memory:')
+    entry, other = journal.open("document"), journal.open("other")
+    for journaled in (entry, other):
+        journaled.record('en', [(0, "first"), (1, "second")])
+    entry.finish()
+    assert entry.completed('en') == {}
+    assert other.completed('en') == {0: "first", 1: "second"}
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from local_backend import PhraseTableBackend
+
+TABLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrase_tables")
+
+
+@pytest.fixture
+def backend():
+    return PhraseTableBackend(TABLES)
+
+
+def test_phrases_with_punctuation_match(backend):
+    assert backend.translate("في سنة.", 'ar', 'en') == "في year."
+
+
+def test_longest_phrase_wins_and_unknown_words_pass_through(backend):
+    assert backend.translate("وزارة الداخلية الجديدة", 'ar', 'en') == \
+        "Ministry of the Interior الجديدة"
+
+
+def test_input_spacing_is_kept(backend):
+    assert backend.translate("مرحبا، كيف حالك؟\nمرحبا", 'ar', 'en') == \
+        "hello، how are you؟\nhello"
+
+
+def test_missing_table_and_language(backend):
+    with pytest.raises(FileNotFoundError):
+        backend.translate("مرحبا", 'ar', 'fr')
+    with pytest.raises(ValueError):
+        backend.translate("مرحبا", 'auto', 'en')
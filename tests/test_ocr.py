@@ -0,0 +1,21 @@
+import ocr
+
+
+def test_cache_key_depends_on_the_engine_and_its_version(monkeypatch):
+    monkeypatch.setattr(ocr, 'tesseract_path', lambda: "/usr/bin/tesseract")
+    monkeypatch.setattr(ocr, 'tesseract_version', lambda binary: "tesseract 5.3.0")
+    stub = ocr.page_key("digest", 'ar', 300, 'stub')
+    tesseract = ocr.page_key("digest", 'ar', 300, 'tesseract')
+    assert stub != tesseract
+    assert ocr.page_key("digest", 'ar', 300, 'tesseract') == tesseract
+
+    monkeypatch.setattr(ocr, 'tesseract_version', lambda binary: "tesseract 5.4.1")
+    assert ocr.page_key("digest", 'ar', 300, 'tesseract') != tesseract
+
+
+def test_stub_results_are_not_served_to_tesseract(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr, 'tesseract_path', lambda: None)
+    cache = ocr.OcrCache(str(tmp_path / "ocr.sqlite3"))
+    cache.put(ocr.page_key("digest", 'ar', 300, 'stub'), "[ocr ar] placeholder")
+    assert cache.get(ocr.page_key("digest", 'ar', 300, 'tesseract')) is None
+    cache.close()
@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+pytest.importorskip('fitz')
+
+from benchmark_suite import synthetic_pages, write_pdf
+from pdf_layout import translate_pdf_layout
+from translation_engine import BatchTranslator, StubBackend
+
+
+def test_fonts_are_embedded_once_per_document(tmp_path):
+    source = str(tmp_path / "source.pdf")
+    output = str(tmp_path / "output.pdf")
+    write_pdf(source, synthetic_pages('arabic', 2))
+    pages = translate_pdf_layout(source, {'en': output}, BatchTranslator(StubBackend()), 'ar')
+    # A full copy of the fonts per block made this several megabytes
+    assert os.path.getsize(output) < pages * 100 * 1024
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip('fitz')
+
+from benchmark_suite import synthetic_pages, write_pdf
+from job_journal import JobJournal
+from pipeline import translate_pages, translate_pdf_file
+from test_job_journal import FailingBackend
+from translation_engine import BatchTranslator, StubBackend
+
+
+class RecordingJournal(JobJournal):
+    def __init__(self):
+        super().__init__(':memory:')
+        self.ids = []
+
+    def open(self, doc_id):
+        self.ids.append(doc_id)
+        return super().open(doc_id)
+
+
+def test_runs_with_and_without_ocr_are_journaled_apart(tmp_path, monkeypatch):
+    monkeypatch.setenv('ARABIC_TRANSLATION_OCR', 'stub')
+    source = str(tmp_path / "source.pdf")
+    write_pdf(source, synthetic_pages('arabic', 1))
+    journal = RecordingJournal()
+    for ocr in (False, True):
+        translate_pdf_file(source, {'en': str(tmp_path / f"{ocr}.pdf")},
+                           BatchTranslator(StubBackend()), 'ar', journal=journal, ocr=ocr,
+                           extract_workers=1)
+    assert len(set(journal.ids)) == 2
+
+
+def test_interrupted_pages_are_not_sent_again():
+    pages = [(i, f"الصفحة رقم {i}") for i in range(5)]
+    entry = JobJournal(':memory:').open("document")
+    backend = FailingBackend(failing=pages[2][1])
+    with pytest.raises(RuntimeError):
+        list(translate_pages(iter(pages), BatchTranslator(backend), 'ar', ['en'], window=1,
+                             journal=entry))
+    assert sorted(entry.completed('en')) == [0, 1]
+
+    backend = FailingBackend()
+    translated = list(translate_pages(iter(pages), BatchTranslator(backend), 'ar', ['en'],
+                                      window=1, journal=entry))
+    assert backend.texts == [text for _, text in pages[2:]]
+    assert [translations['en'] for _, _, translations in translated] == \
+        [f"[en] {text}" for _, text in pages]
+
+
+def test_finished_documents_leave_the_journal(tmp_path):
+    source = str(tmp_path / "source.pdf")
+    write_pdf(source, synthetic_pages('arabic', 2))
+    journal = RecordingJournal()
+    translate_pdf_file(source, {'en': str(tmp_path / "en.pdf")}, BatchTranslator(StubBackend()),
+                       'ar', journal=journal, extract_workers=1)
+    assert journal.open(journal.ids[0]).completed('en') == {}
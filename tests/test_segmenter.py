@@ -0,0 +1,63 @@
+from segmenter import join_segments, segment_text
+
+
+def texts(segments):
+    return [segment.text for segment in segments]
+
+
+def test_splits_on_sentence_punctuation():
+    text = ("This is the first sentence of the record and it is long enough. "
+            "The second sentence follows it and is also long enough to stand alone! "
+            "هل هذه هي الجملة الثالثة في هذا السطر الطويل من الوثيقة التاريخية المحفوظة؟ "
+            "The last one.")
+    segments = segment_text(text, min_chars=40)
+    assert texts(segments) == [
+        "This is the first sentence of the record and it is long enough.",
+        "The second sentence follows it and is also long enough to stand alone!",
+        "هل هذه هي الجملة الثالثة في هذا السطر الطويل من الوثيقة التاريخية المحفوظة؟",
+        "The last one.",
+    ]
+    assert [segment.end for segment in segments] == [" ", " ", " ", ""]
+
+
+def test_segments_never_exceed_max_chars():
+    words = " ".join(f"word{i}" for i in range(400))
+    clauses = "، ".join(f"جملة فرعية رقم {i} من النص" for i in range(60))
+    for text in (words, clauses, "x" * 2500):
+        segments = segment_text(text, max_chars=100)
+        assert all(len(segment.text) <= 100 for segment in segments)
+        assert "".join(texts(segments)).replace(" ", "").replace("،", "") == \
+            text.replace(" ", "").replace("،", "")
+
+
+def test_short_fragments_are_merged_within_a_line():
+    segments = segment_text("Yes. No. Maybe. Fine.\nNext line.", min_chars=80)
+    assert texts(segments) == ["Yes. No. Maybe. Fine.", "Next line."]
+
+
+def test_short_fragments_are_not_merged_across_lines():
+    segments = segment_text("Line A\nLine B")
+    assert texts(segments) == ["Line A", "Line B"]
+    assert join_segments(segments, ["A", "B"]) == "A\nB"
+
+
+def test_headers_and_footers_are_segments_of_their_own():
+    pages = [f"بسم الله الرحمن الرحيم\nوزارة الداخلية\nنص الصفحة رقم {i} من التقرير.\nصفحة {i}"
+             for i in range(3)]
+    for i, page in enumerate(pages):
+        assert texts(segment_text(page)) == ["بسم الله الرحمن الرحيم", "وزارة الداخلية",
+                                             f"نص الصفحة رقم {i} من التقرير.", f"صفحة {i}"]
+
+
+def test_join_segments_round_trips_the_layout():
+    text = "Title\n\nFirst paragraph. Second sentence.\nAnother line\n\n\nالسطر الأخير."
+    segments = segment_text(text)
+    assert join_segments(segments, texts(segments)) == text
+
+
+def test_rewrap_joins_lines_wrapped_by_the_page_width():
+    text = "a sentence wrapped\nby the page width.\nNext sentence."
+    assert texts(segment_text(text)) == ["a sentence wrapped", "by the page width.",
+                                         "Next sentence."]
+    assert texts(segment_text(text, rewrap=True)) == ["a sentence wrapped by the page width.",
+                                                      "Next sentence."]
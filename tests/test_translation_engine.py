@@ -0,0 +1,56 @@
+from translation_engine import BatchTranslator, GoogleBackend, StubBackend
+
+
+class RecordingBackend(StubBackend):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def translate(self, text, src, dest):
+        self.texts.append(text)
+        return super().translate(text, src, dest)
+
+
+class MergingBackend(RecordingBackend):
+    # Joins the lines of a multi-line request, as online services sometimes do
+    def translate(self, text, src, dest):
+        return super().translate(text, src, dest).replace("\n", " ")
+
+
+def sample_lines():
+    return [f"سطر رقم {i} من الوثيقة" for i in range(25)]
+
+
+def test_google_client_is_built_on_first_request():
+    # Importing googletrans and building its client is deferred out of GUI startup
+    assert GoogleBackend().translator is None
+
+
+def test_requests_stay_within_the_batch_limits():
+    lines = sample_lines()
+    for max_chars, max_lines in ((4500, 10), (60, 100)):
+        backend = RecordingBackend()
+        BatchTranslator(backend, max_chars=max_chars, max_lines=max_lines).translate_lines(
+            lines, 'ar', 'en')
+        assert [line for text in backend.texts for line in text.split("\n")] == lines
+        for text in backend.texts:
+            assert len(text.split("\n")) <= max_lines
+            assert len(text) + 1 <= max_chars
+
+
+def test_results_land_on_their_lines():
+    lines = sample_lines()
+    lines[3:3] = ["", "   "]
+    backend = RecordingBackend()
+    translated = BatchTranslator(backend, max_lines=4, max_workers=3).translate_lines(
+        lines, 'ar', 'en')
+    assert translated == [f"[en] {line}" if line.strip() else line for line in lines]
+
+
+def test_lines_are_sent_one_by_one_when_the_backend_merges_them():
+    lines = sample_lines()[:6]
+    backend = MergingBackend()
+    translated = BatchTranslator(backend, max_lines=3).translate_lines(lines, 'ar', 'en')
+    assert translated == [f"[en] {line}" for line in lines]
+    # Two merged batch requests, then each of their lines on its own
+    assert backend.texts == ["\n".join(lines[:3])] + lines[:3] + ["\n".join(lines[3:])] + lines[3:]
@@ -0,0 +1,82 @@
+import sqlite3
+
+from translation_memory import TranslationMemory
+
+
+def test_entries_are_kept_per_backend():
+    memory = TranslationMemory(':memory:')
+    memory.add_many([("وزارة الداخلية", "[stub] وزارة الداخلية")], 'ar', 'en', 'stub')
+    assert memory.lookup("وزارة الداخلية", 'ar', 'en', 'google') is None
+    match = memory.lookup("وزارة الداخلية", 'ar', 'en', 'stub')
+    assert match.translation == "[stub] وزارة الداخلية"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    memory = TranslationMemory(path, max_entries=3)
+    sources = ["وزارة الداخلية", "بسم الله الرحمن الرحيم", "تقرير سري"]
+    for i, source in enumerate(sources):
+        memory.add_many([(source, f"line {i}")], 'ar', 'en', 'stub')
+    assert memory.lookup(sources[0], 'ar', 'en', 'stub').score == 1.0
+    memory.add_many([("سطر جديد تماما في الوثيقة", "a new line")], 'ar', 'en', 'stub')
+    assert len(memory) == 3
+    # The second entry was the least recently used one, the first was reused
+    assert memory.lookup(sources[0], 'ar', 'en', 'stub').translation == "line 0"
+    assert memory.lookup(sources[1], 'ar', 'en', 'stub') is None
+    memory.close()
+    assert len(TranslationMemory(path, max_entries=3)) == 3
+
+
+def test_entries_without_a_backend_are_set_aside(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE memory (src TEXT NOT NULL, dest TEXT NOT NULL, source TEXT NOT NULL,"
+                 " translation TEXT NOT NULL, PRIMARY KEY (src, dest, source))")
+    conn.execute("INSERT INTO memory VALUES ('ar', 'en', 'نص', 'text')")
+    conn.commit()
+    conn.close()
+    memory = TranslationMemory(path)
+    assert len(memory) == 0
+    assert memory.lookup("نص", 'ar', 'en', 'google') is None
+
+
+def test_reuse_threshold_skips_fuzzy_scoring(monkeypatch):
+    memory = TranslationMemory(':memory:')
+    memory.add_many([("تقرير عن الوضع في المدينة سنة 1954", "Report on the city in 1954"),
+                     ("تقرير عن الوضع في القرية", "Report on the village")], 'ar', 'en', 'stub')
+
+    def matcher(*args, **kwargs):
+        raise AssertionError("fuzzy scoring at a reuse threshold of 1.0")
+    monkeypatch.setattr('difflib.SequenceMatcher', matcher)
+    match = memory.lookup("تقرير عن الوضع في المدينة سنة 1955", 'ar', 'en', 'stub', 1.0)
+    assert match.translation == "Report on the city in 1955"
+    assert memory.lookup("تقرير عن الوضع في المدينة", 'ar', 'en', 'stub', 1.0) is None
+
+
+def test_index_is_stored_with_the_entries(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    memory = TranslationMemory(path)
+    memory.add_many([("تقرير وزارة الداخلية عن الوضع في المدينة القديمة سنة ألف وتسعمائة",
+                      "Report on the old city")], 'ar', 'en', 'stub')
+    memory.close()
+    # A reopened memory finds near matches without reindexing its entries
+    match = TranslationMemory(path).lookup(
+        "تقرير وزارة الداخلية عن الوضع في المدينة الجديدة سنة ألف وتسعمائة", 'ar', 'en', 'stub')
+    assert match.translation == "Report on the old city"
+    assert 0.75 <= match.score < 1.0
+
+
+def test_entries_stored_before_the_index_are_indexed(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE memory (src TEXT NOT NULL, dest TEXT NOT NULL, backend TEXT NOT NULL,"
+                 " source TEXT NOT NULL, translation TEXT NOT NULL, last_used REAL NOT NULL,"
+                 " PRIMARY KEY (src, dest, backend, source))")
+    conn.execute("INSERT INTO memory VALUES ('ar', 'en', 'stub', 'الصفحة 12 من التقرير',"
+                 " 'Page 12 of the report', 0)")
+    conn.commit()
+    conn.close()
+    memory = TranslationMemory(path)
+    assert len(memory) == 1
+    match = memory.lookup("الصفحة 13 من التقرير", 'ar', 'en', 'stub')
+    assert match.translation == "Page 13 of the report" and match.adapted
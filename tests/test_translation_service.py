@@ -0,0 +1,19 @@
+import asyncio
+
+import pytest
+
+from translation_engine import BatchTranslator, StubBackend
+from translation_service import HttpError, TranslationService
+
+
+def test_unreadable_pdf_is_a_client_error():
+    pytest.importorskip('fitz')
+    service = TranslationService(BatchTranslator(StubBackend()))
+    try:
+        with pytest.raises(HttpError) as error:
+            asyncio.run(service.dispatch('POST', '/translate_pdf', 'dest=en',
+                                         b"%PDF-1.4 not really a pdf"))
+    finally:
+        service.close()
+    assert error.value.status == 400
+    assert str(error.value) == "Invalid PDF"
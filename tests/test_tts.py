@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from audio_cache import AudioCache
+from tts import Speech
+
+
+def test_stub_audio_is_not_reused_for_another_engine(tmp_path):
+    cache = AudioCache(str(tmp_path / "audio"))
+    speech = Speech("مرحبا بكم في التقرير.", 'ar', cache, engine='stub')
+    speech.synthesize_chunk(0)
+    assert Speech("مرحبا بكم في التقرير.", 'ar', cache, engine='stub').paths[0] is not None
+    assert Speech("مرحبا بكم في التقرير.", 'ar', cache, engine='gtts').paths[0] is None
+
+
+def slow_speech(tmp_path, monkeypatch, calls):
+    import time
+
+    import tts
+
+    real_synthesize = tts.synthesize
+
+    def slow_synthesize(text, lang, path, engine=None):
+        calls.append(text)
+        time.sleep(0.05)
+        real_synthesize(text, lang, path, engine)
+
+    monkeypatch.setattr(tts, 'synthesize', slow_synthesize)
+    text = " ".join(f"هذه هي الجملة رقم {i} من النص الذي يقرأ بصوت عال." for i in range(12))
+    return Speech(text, 'ar', AudioCache(str(tmp_path / "audio")), max_chars=60, engine='stub')
+
+
+def test_concurrent_callers_share_chunks_in_flight(tmp_path, monkeypatch):
+    calls = []
+    speech = slow_speech(tmp_path, monkeypatch, calls)
+    reader = threading.Thread(target=speech.synthesize, kwargs={'max_workers': 2})
+    reader.start()
+    time.sleep(0.02)
+    speech.synthesize(max_workers=2)
+    reader.join()
+    assert speech.complete()
+    assert sorted(calls) == sorted(speech.chunks)
+
+
+def test_chunks_of_a_stopped_caller_are_finished_by_the_other(tmp_path, monkeypatch):
+    class Stop(Exception):
+        pass
+
+    def stop(done, total):
+        raise Stop()
+
+    def read_aloud():
+        with pytest.raises(Stop):
+            speech.synthesize(max_workers=2, progress=stop)
+
+    calls = []
+    speech = slow_speech(tmp_path, monkeypatch, calls)
+    reader = threading.Thread(target=read_aloud)
+    reader.start()
+    time.sleep(0.02)
+    speech.synthesize(max_workers=2)
+    reader.join()
+    assert speech.complete()
+    assert sorted(calls) == sorted(speech.chunks)
@@ -0,0 +1,117 @@
+# Persistent translation cache
+#
+# Translations are stored in SQLite keyed by a hash of
+# (normalized segment text, src, dest, backend). The least recently used
+# entries are evicted once the cache grows past max_entries.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "arabic_translation",
+                                  "translations.sqlite3")
+DEFAULT_MAX_ENTRIES = 200000
+
+
+def normalize_segment(text):
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+
+def cache_key(text, src, dest, backend):
+    raw = "\0".join([normalize_segment(text), src or 'auto', dest, backend])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or os.environ.get('ARABIC_TRANSLATION_CACHE', DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used "
+                          "ON translations (last_used)")
+        self.conn.commit()
+
+    def get_many(self, texts, src, dest, backend):
+        # Returns {text: translation} for every cached text
+        keys = {cache_key(text, src, dest, backend): text for text in texts}
+        found = {}
+        with self.lock:
+            key_list = list(keys)
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                    chunk).fetchall()
+                for key, translation in rows:
+                    found[keys[key]] = translation
+            if found:
+                now = time.time()
+                self.conn.executemany("UPDATE translations SET last_used = ? WHERE key = ?",
+                                      [(now, key) for key, text in keys.items() if text in found])
+                self.conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, text, src, dest, backend):
+        return self.get_many([text], src, dest, backend).get(text)
+
+    def put_many(self, pairs, src, dest, backend):
+        now = time.time()
+        rows = [(cache_key(text, src, dest, backend), translation, now)
+                for text, translation in pairs]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?)", rows)
+            self.evict()
+            self.conn.commit()
+
+    def put(self, text, translation, src, dest, backend):
+        self.put_many([(text, translation)], src, dest, backend)
+
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute("""
+                DELETE FROM translations WHERE key IN (
+                    SELECT key FROM translations ORDER BY last_used LIMIT ?
+                )""", (count - self.max_entries,))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self),
+        }
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM translations")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
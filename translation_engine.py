@@ -0,0 +1,259 @@
+# Batched translation engine
+#
+# Instead of one request per line, lines are packed into size-bounded
+# requests (joined with newlines), sent to a backend in one round-trip and
+# split back onto the original line boundaries. Batches for one or more
+# target languages are sent concurrently, with a bounded number of requests
+# in flight, a token-bucket rate limit and backoff on throttling.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dedup import DedupIndex, group_segments
+from instrumentation import span
+from rate_limit import TokenBucket, call_with_backoff
+from segmenter import join_segments, segment_text
+from translation_cache import TranslationCache
+from translation_memory import TranslationMemory
+
+# googletrans rejects requests above ~5000 characters
+MAX_REQUEST_CHARS = 4500
+MAX_REQUEST_LINES = 100
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 5
+
+
+class GoogleBackend:
+    name = 'google'
+
+    def __init__(self):
+        # googletrans (and httpx) take a few hundred ms to import; the client
+        # is built on the first request, not when the GUI starts
+        self.translator = None
+        self.lock = threading.Lock()
+
+    def client(self):
+        with self.lock:
+            if self.translator is None:
+                from googletrans import Translator
+                self.translator = Translator()
+            return self.translator
+
+    def translate(self, text, src, dest):
+        translation = self.client().translate(text, dest=dest, src=src or 'auto')
+        return translation.text
+
+
+class StubBackend:
+    # Local stand-in for offline testing and benchmarks
+    name = 'stub'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def translate(self, text, src, dest):
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return "\n".join(f"[{dest}] {line}" for line in text.split("\n"))
+
+
+def create_backend(name=None):
+    # Backends are plain objects with a `name` and translate(text, src, dest);
+    # ARABIC_TRANSLATION_BACKEND selects the default (google, local or stub)
+    name = name or os.environ.get('ARABIC_TRANSLATION_BACKEND', 'google')
+    if name == 'google':
+        return GoogleBackend()
+    elif name == 'local':
+        from local_backend import PhraseTableBackend
+        return PhraseTableBackend()
+    elif name == 'stub':
+        return StubBackend()
+    raise ValueError(f"Unknown translation backend: {name}")
+
+
+BACKENDS = ['google', 'local', 'stub']
+
+
+class BatchTranslator:
+    def __init__(self, backend=None, cache=None, max_chars=MAX_REQUEST_CHARS,
+                 max_lines=MAX_REQUEST_LINES, max_workers=1, rate_limiter=None, retries=5,
+                 memory=None, memory_reuse_threshold=1.0):
+        self.backend = backend if backend is not None else create_backend()
+        self.cache = cache
+        # Fuzzy matches at or above the threshold are reused without a request;
+        # 1.0 only reuses exact matches and matches differing only in numbers
+        self.memory = memory
+        self.memory_reuse_threshold = memory_reuse_threshold
+        self.max_chars = max_chars
+        self.max_lines = max_lines
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+
+    def batches(self, lines, indices):
+        # Group line indices so that each joined request stays within limits
+        batch = []
+        size = 0
+        for i in indices:
+            length = len(lines[i]) + 1
+            if batch and (size + length > self.max_chars or len(batch) >= self.max_lines):
+                yield batch
+                batch = []
+                size = 0
+            batch.append(i)
+            size += length
+        if batch:
+            yield batch
+
+    def request(self, text, src, dest):
+        if self.rate_limiter:
+            with span('translate.rate_limit'):
+                self.rate_limiter.acquire()
+        with span('translate.request', chars=len(text), segments=text.count("\n") + 1):
+            return self.backend.translate(text, src, dest)
+
+    def send(self, text, src, dest):
+        return call_with_backoff(self.request, text, src, dest, retries=self.retries)
+
+    def translate_batch(self, chunks, src, dest):
+        translated = self.send("\n".join(chunks), src, dest)
+        parts = translated.split("\n")
+        if len(parts) != len(chunks):
+            # The backend merged or split lines, so fall back to one request per line
+            parts = [self.send(chunk, src, dest) for chunk in chunks]
+        return [part.strip() for part in parts]
+
+    def translate_many(self, lines, src, dests, progress=None, journal=None, dedup=None):
+        # Translate the same lines into several languages; returns {dest: lines}
+        # Repeated lines (after normalization) are translated once and fanned
+        # out to every occurrence; pass a shared DedupIndex to dedupe across
+        # calls and collect per-document stats. With a journal entry, lines
+        # completed by an earlier interrupted run are reused and new batches
+        # are recorded as they finish.
+        results = {dest: list(lines) for dest in dests}
+        candidates = [i for i, line in enumerate(lines) if line.strip()]
+        total = len(candidates) * len(dests)
+        done = 0
+        tasks = []
+
+        if dedup is None:
+            dedup = DedupIndex()
+        groups = group_segments(lines, candidates)
+        dedup.observe(groups)
+        # Each group is represented by its first occurrence
+        members = {group[0]: group for group in groups.values()}
+        keys = {group[0]: key for key, group in groups.items()}
+
+        def fill(dest, rep, translation):
+            for i in members[rep]:
+                results[dest][i] = translation
+
+        for dest in dests:
+            pending = []
+            for rep in members:
+                translation = dedup.get(keys[rep], dest)
+                if translation is None:
+                    pending.append(rep)
+                else:
+                    fill(dest, rep, translation)
+            if journal is not None:
+                completed = journal.completed(dest)
+                for rep in pending:
+                    if rep in completed:
+                        fill(dest, rep, completed[rep])
+                pending = [rep for rep in pending if rep not in completed]
+            if self.cache is not None and pending:
+                cached = self.cache.get_many([lines[rep] for rep in pending], src, dest,
+                                             self.backend.name)
+                if cached:
+                    for rep in pending:
+                        if lines[rep] in cached:
+                            fill(dest, rep, cached[lines[rep]])
+                    pending = [rep for rep in pending if lines[rep] not in cached]
+            if self.memory is not None and pending:
+                reused = set()
+                for rep in pending:
+                    # Only matches that can be reused are looked for: at 1.0,
+                    # exact and number-adapted ones, without fuzzy scoring
+                    match = self.memory.lookup(lines[rep], src, dest, self.backend.name,
+                                               self.memory_reuse_threshold)
+                    if match is not None and match.score >= self.memory_reuse_threshold:
+                        fill(dest, rep, match.translation)
+                        reused.add(rep)
+                pending = [rep for rep in pending if rep not in reused]
+            done += len(candidates) - sum(len(members[rep]) for rep in pending)
+            tasks.extend((dest, batch) for batch in self.batches(lines, pending))
+
+        if progress and done:
+            progress(done, total)
+        if not tasks:
+            return results
+
+        # At most max_workers requests are in flight; results land by index
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {
+                executor.submit(self.translate_batch, [lines[i].strip() for i in batch],
+                                src, dest): (dest, batch)
+                for dest, batch in tasks
+            }
+            for future in as_completed(futures):
+                dest, batch = futures[future]
+                for rep, part in zip(batch, future.result()):
+                    fill(dest, rep, part)
+                    dedup.put(keys[rep], dest, part)
+                if self.cache is not None:
+                    self.cache.put_many([(lines[rep], results[dest][rep]) for rep in batch],
+                                        src, dest, self.backend.name)
+                if self.memory is not None:
+                    self.memory.add_many([(lines[rep], results[dest][rep]) for rep in batch],
+                                         src, dest, self.backend.name)
+                if journal is not None:
+                    journal.record(dest, [(i, results[dest][i])
+                                          for rep in batch for i in members[rep]])
+                done += sum(len(members[rep]) for rep in batch)
+                if progress:
+                    progress(done, total)
+        finally:
+            # Drop queued batches if we stopped early (error or cancellation)
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return results
+
+    def translate_lines(self, lines, src, dest, progress=None, journal=None, dedup=None):
+        return self.translate_many(lines, src, [dest], progress, journal, dedup)[dest]
+
+    def translate_text(self, text, src, dest, progress=None, journal=None, dedup=None,
+                       rewrap=False):
+        return self.translate_text_many(text, src, [dest], progress, journal, dedup,
+                                        rewrap)[dest]
+
+    def translate_text_many(self, text, src, dests, progress=None, journal=None, dedup=None,
+                            rewrap=False):
+        # Free text is cut into sentence-aware, length-bounded segments first;
+        # rewrap=True joins lines wrapped by the page width (see segmenter.py)
+        segments = segment_text(text, rewrap=rewrap)
+        results = self.translate_many([segment.text for segment in segments], src, dests,
+                                      progress, journal, dedup)
+        return {dest: join_segments(segments, translations)
+                for dest, translations in results.items()}
+
+
+def create_translator(backend=None, cache_path=None, max_workers=DEFAULT_MAX_WORKERS,
+                      requests_per_second=DEFAULT_REQUESTS_PER_SECOND, memory_path=None):
+    # Shared entry point for test.py and the GUIs: batching, concurrency,
+    # rate limiting, the on-disk cache and the translation memory. Only the
+    # remote service is rate limited.
+    backend = backend if backend is not None else create_backend()
+    rate_limiter = None
+    if requests_per_second and backend.name == 'google':
+        rate_limiter = TokenBucket(requests_per_second)
+    return BatchTranslator(backend, cache=TranslationCache(cache_path),
+                           max_workers=max_workers, rate_limiter=rate_limiter,
+                           memory=TranslationMemory(memory_path))
@@ -0,0 +1,262 @@
+# Translation memory with fuzzy matching
+#
+# Prior translations (and edits accepted in the GUI) are indexed with MinHash
+# signatures over character trigrams and looked up through locality
+# sensitive hashing: only entries that share a band with the query are
+# compared, so lookups stay fast with millions of stored segments. Near
+# matches that differ only in their numbers (dates, page numbers) have the
+# numbers substituted in the stored translation and can be reused as is;
+# other near matches are returned as suggestions with a similarity score.
+#
+# The index lives in SQLite next to the entries: the band keys of every
+# segment are stored in their own table, and a hash of the segment with its
+# numbers masked finds number-only variants. Nothing is loaded at startup and
+# a lookup is a few indexed queries, whatever the size of the memory.
+#
+# Entries are keyed by (src, dest, backend, segment), like the translation
+# cache, so output of the stub or the offline phrase table is never reused
+# for another backend. The memory keeps at most max_entries segments; the
+# least recently used ones are evicted.
+
+import difflib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from dedup import normalize_segment
+
+DEFAULT_MEMORY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "arabic_translation",
+                                   "memory.sqlite3")
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_MAX_ENTRIES = 2000000
+BANDS = 4
+ROWS = 3
+SHINGLE_SIZE = 3
+MAX_CANDIDATES = 20
+_BAND_MODULUS = (1 << 61) - 1  # band keys are stored as SQLite integers
+
+_NUMBER = re.compile(r"\d+")
+
+Match = namedtuple('Match', ['source', 'translation', 'score', 'adapted'])
+
+
+def shingles(text):
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode('utf-8'))}
+    return {zlib.crc32(text[i:i + SHINGLE_SIZE].encode('utf-8'))
+            for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def band_keys(text):
+    # One-permutation MinHash: every shingle hash is assigned to one of the
+    # signature bins by its low bits and each bin keeps its minimum, so a
+    # signature costs one pass over the shingles. Empty bins borrow from the
+    # next non-empty bin. Numbers are masked so that segments differing only
+    # in dates or page numbers always land in the same buckets.
+    bins = BANDS * ROWS
+    signature = [None] * bins
+    for value in shingles(_NUMBER.sub("0", text)):
+        value = (value * 0x9E3779B1) & 0xFFFFFFFF
+        slot = value % bins
+        value //= bins
+        if signature[slot] is None or value < signature[slot]:
+            signature[slot] = value
+    for slot in range(bins):
+        if signature[slot] is None:
+            for step in range(1, bins):
+                borrowed = signature[(slot + step) % bins]
+                if borrowed is not None:
+                    signature[slot] = borrowed + step
+                    break
+    # Band keys are persisted, so they are combined arithmetically rather
+    # than with hash(), whose values may change between Python versions
+    keys = []
+    for band in range(BANDS):
+        key = band
+        for value in signature[band * ROWS:(band + 1) * ROWS]:
+            key = ((key << 32) + value) % _BAND_MODULUS
+        keys.append(key)
+    return keys
+
+
+def number_pattern(text):
+    # Segments that only differ in their numbers share a pattern
+    return zlib.crc32(_NUMBER.sub("0", text).encode('utf-8'))
+
+
+def adapt_numbers(source, translation, query):
+    # If source and query only differ in their numbers, carry the query's
+    # numbers over into the translation; returns None otherwise
+    if _NUMBER.sub("0", source) != _NUMBER.sub("0", query):
+        return None
+    old_numbers = _NUMBER.findall(source)
+    new_numbers = _NUMBER.findall(query)
+    if _NUMBER.findall(translation) != old_numbers:
+        return None
+    replacements = iter(new_numbers)
+    return _NUMBER.sub(lambda m: next(replacements), translation)
+
+
+class TranslationMemory:
+    def __init__(self, path=None, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or os.environ.get('ARABIC_TRANSLATION_MEMORY', DEFAULT_MEMORY_PATH)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.count = None      # counted on the first write
+        self.touched = set()   # ids of entries reused since the last write
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(memory)")]
+        unindexed = bool(columns) and 'backend' in columns and 'pattern' not in columns
+        if columns and 'backend' not in columns:
+            # Entries written before the backend was recorded cannot be
+            # attributed to one; they are set aside instead of reused
+            self.conn.execute("ALTER TABLE memory RENAME TO memory_without_backend")
+        elif unindexed:
+            self.conn.execute("ALTER TABLE memory RENAME TO memory_unindexed")
+            self.conn.execute("DROP INDEX IF EXISTS memory_last_used")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory (
+                id INTEGER PRIMARY KEY,
+                src TEXT NOT NULL,
+                dest TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                pattern INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                UNIQUE (src, dest, backend, source)
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memory_pattern ON memory (pattern)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                entry INTEGER NOT NULL,
+                PRIMARY KEY (band, entry)
+            ) WITHOUT ROWID""")
+        if unindexed:
+            # Entries stored before the index was persisted get their band
+            # keys once, here
+            self.insert(self.conn.execute("SELECT src, dest, backend, source, translation, "
+                                          "last_used FROM memory_unindexed"))
+            self.conn.execute("DROP TABLE memory_unindexed")
+        self.conn.commit()
+
+    def insert(self, rows):
+        for src, dest, backend, key, translation, now in rows:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO memory (src, dest, backend, source, translation, pattern, "
+                "last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (src, dest, backend, key, translation, number_pattern(key), now))
+            if cursor.rowcount:
+                self.conn.executemany("INSERT OR IGNORE INTO bands VALUES (?, ?)",
+                                      [(band_key, cursor.lastrowid) for band_key in band_keys(key)])
+                if self.count is not None:
+                    self.count += 1
+            else:
+                self.conn.execute("UPDATE memory SET translation = ?, last_used = ? WHERE src = ? "
+                                  "AND dest = ? AND backend = ? AND source = ?",
+                                  (translation, now, src, dest, backend, key))
+
+    def evict(self):
+        # Drops the least recently used entries above max_entries
+        if self.count is None:
+            self.count = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        if self.count <= self.max_entries:
+            return
+        rows = self.conn.execute("SELECT id, source FROM memory ORDER BY last_used LIMIT ?",
+                                 (self.count - self.max_entries,)).fetchall()
+        self.conn.executemany("DELETE FROM bands WHERE band = ? AND entry = ?",
+                              [(band_key, entry_id) for entry_id, source in rows
+                               for band_key in band_keys(source)])
+        self.conn.executemany("DELETE FROM memory WHERE id = ?",
+                              [(entry_id,) for entry_id, _ in rows])
+        self.count -= len(rows)
+
+    def write_touched(self, now):
+        if self.touched:
+            self.conn.executemany("UPDATE memory SET last_used = ? WHERE id = ?",
+                                  [(now, entry_id) for entry_id in self.touched])
+            self.touched.clear()
+
+    def add_many(self, pairs, src, dest, backend):
+        src = src or 'auto'
+        now = time.time()
+        rows = [(src, dest, backend, normalize_segment(source), translation, now)
+                for source, translation in pairs if source.strip() and translation.strip()]
+        with self.lock:
+            self.insert(rows)
+            self.write_touched(now)
+            self.evict()
+            self.conn.commit()
+
+    def add(self, source, translation, src, dest, backend):
+        self.add_many([(source, translation)], src, dest, backend)
+
+    def lookup(self, text, src, dest, backend, threshold=None):
+        # Returns the best Match at or above the threshold, or None
+        threshold = self.threshold if threshold is None else threshold
+        src = src or 'auto'
+        key = normalize_segment(text)
+        with self.lock:
+            row = self.conn.execute("SELECT id, translation FROM memory WHERE src = ? AND dest = ? "
+                                    "AND backend = ? AND source = ?",
+                                    (src, dest, backend, key)).fetchone()
+            if row is not None:
+                # Recorded as used with the next write
+                self.touched.add(row[0])
+                return Match(key, row[1], 1.0, False)
+
+            # Both queries name their index or join order: left to itself,
+            # SQLite scans every entry of the language pair instead
+            variants = self.conn.execute("SELECT source, translation FROM memory "
+                                         "INDEXED BY memory_pattern WHERE pattern = ? "
+                                         "AND src = ? AND dest = ? AND backend = ? LIMIT ?",
+                                         (number_pattern(key), src, dest, backend,
+                                          MAX_CANDIDATES)).fetchall()
+            for source, translation in variants:
+                adapted = adapt_numbers(source, translation, key)
+                if adapted is not None:
+                    return Match(source, adapted, 1.0, True)
+            if threshold >= 1.0:
+                # Only an exact or number-adapted match scores 1.0
+                return None
+
+            # Rank candidates by the number of bands they share with the query
+            keys = band_keys(key)
+            entries = self.conn.execute(
+                "SELECT memory.source, memory.translation FROM bands "
+                "CROSS JOIN memory ON memory.id = bands.entry "
+                f"WHERE bands.band IN ({', '.join('?' * len(keys))}) "
+                "AND memory.src = ? AND memory.dest = ? AND memory.backend = ? "
+                "GROUP BY bands.entry ORDER BY COUNT(*) DESC LIMIT ?",
+                keys + [src, dest, backend, MAX_CANDIDATES]).fetchall()
+
+        best = None
+        for source, translation in entries:
+            matcher = difflib.SequenceMatcher(None, source, key, autojunk=False)
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold and (best is None or score > best.score):
+                best = Match(source, translation, score, False)
+        return best
+
+    def __len__(self):
+        with self.lock:
+            self.count = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+            return self.count
+
+    def close(self):
+        with self.lock:
+            self.write_touched(time.time())
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,332 @@
+# Local HTTP translation service
+#
+# Usage:
+#   python -m arabic_translation serve --port 8765
+#
+# Runs the translation engine as one shared process for several desktop
+# clients and scripts, on a plain asyncio HTTP/1.1 server (no web framework
+# needed). All clients share one translator, so one backend client with its
+# connection pool, one rate limit, the on-disk cache and the translation
+# memory. Identical requests that arrive while the first one is still being
+# translated are coalesced: they wait for the same result instead of
+# calling the backend again, so N users translating the same archive cost
+# one set of backend requests.
+#
+#   POST /translate       {"text": ..., "src": "ar", "dest": "en" or ["en", "fr"]}
+#                         -> {"src": ..., "translations": {dest: text}}
+#   POST /translate_pdf?src=ar&dest=en[&layout=1][&ocr=1]
+#                         body: the PDF; returns the translated PDF
+#   GET  /metrics         counters in the Prometheus text format
+#   GET  /health          {"status": "ok"}
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_JOBS = 8
+MAX_TEXT_BODY = 16 * 1024 * 1024
+MAX_PDF_BODY = 256 * 1024 * 1024
+HEADER_TIMEOUT = 30
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MeteredBackend:
+    # Counts the requests the shared translator sends to the real backend
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def translate(self, text, src, dest):
+        start = time.perf_counter()
+        try:
+            return self.backend.translate(text, src, dest)
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            raise
+        finally:
+            with self.lock:
+                self.requests += 1
+                self.seconds += time.perf_counter() - start
+
+
+class ServiceMetrics:
+    # Only updated from the event loop thread
+    def __init__(self):
+        self.requests = {}  # (endpoint, status) -> count
+        self.seconds = {}  # endpoint -> total seconds
+        self.coalesced = {}  # endpoint -> requests that joined a running job
+        self.in_flight = 0
+        self.started = time.time()
+
+    def observe(self, endpoint, status, seconds):
+        self.requests[endpoint, status] = self.requests.get((endpoint, status), 0) + 1
+        self.seconds[endpoint] = self.seconds.get(endpoint, 0.0) + seconds
+
+    def render(self, backend, cache):
+        lines = [
+            "# TYPE translation_service_requests_total counter",
+            *(f'translation_service_requests_total{{endpoint="{endpoint}",status="{status}"}} '
+              f'{count}' for (endpoint, status), count in sorted(self.requests.items())),
+            "# TYPE translation_service_request_seconds_total counter",
+            *(f'translation_service_request_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}'
+              for endpoint, seconds in sorted(self.seconds.items())),
+            "# TYPE translation_service_coalesced_total counter",
+            *(f'translation_service_coalesced_total{{endpoint="{endpoint}"}} {count}'
+              for endpoint, count in sorted(self.coalesced.items())),
+            "# TYPE translation_service_in_flight gauge",
+            f"translation_service_in_flight {self.in_flight}",
+            "# TYPE translation_service_uptime_seconds gauge",
+            f"translation_service_uptime_seconds {time.time() - self.started:.3f}",
+            "# TYPE translation_backend_requests_total counter",
+            f'translation_backend_requests_total{{backend="{backend.name}"}} {backend.requests}',
+            "# TYPE translation_backend_errors_total counter",
+            f'translation_backend_errors_total{{backend="{backend.name}"}} {backend.errors}',
+            "# TYPE translation_backend_seconds_total counter",
+            f'translation_backend_seconds_total{{backend="{backend.name}"}} {backend.seconds:.6f}',
+        ]
+        if cache is not None:
+            stats = cache.stats()
+            lines += [
+                "# TYPE translation_cache_hits_total counter",
+                f"translation_cache_hits_total {stats['hits']}",
+                "# TYPE translation_cache_misses_total counter",
+                f"translation_cache_misses_total {stats['misses']}",
+                "# TYPE translation_cache_entries gauge",
+                f"translation_cache_entries {stats['entries']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def parse_languages(src, dest):
+    dests = [dest] if isinstance(dest, str) else dest
+    if not isinstance(dests, list) or not dests or not all(isinstance(d, str) and d
+                                                           for d in dests):
+        raise HttpError(400, "'dest' must be a language code or a list of them")
+    if src is not None and not isinstance(src, str):
+        raise HttpError(400, "'src' must be a language code")
+    # auto-detection is the backend's default
+    return (src or None) if src != 'auto' else None, dests
+
+
+class TranslationService:
+    def __init__(self, translator, journal=None, jobs=DEFAULT_JOBS):
+        self.translator = translator
+        self.backend = MeteredBackend(translator.backend)
+        translator.backend = self.backend
+        self.journal = journal
+        self.metrics = ServiceMetrics()
+        # Blocking translation work runs here, off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=jobs)
+        self.running = {}  # coalescing key -> future of the running job
+
+    async def coalesce(self, endpoint, key, func, *args):
+        # Identical concurrent requests share one job; the result is not kept
+        # once the job is done (the translation cache covers repeats)
+        future = self.running.get(key)
+        if future is not None:
+            self.metrics.coalesced[endpoint] = self.metrics.coalesced.get(endpoint, 0) + 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, func, *args)
+            self.running[key] = future
+            future.add_done_callback(lambda f: self.running.pop(key, None))
+        # A client that disconnects must not cancel the job for the others
+        return await asyncio.shield(future)
+
+    async def translate(self, body):
+        try:
+            request = json.loads(body)
+        except ValueError as e:
+            raise HttpError(400, f"Invalid JSON: {e}")
+        if not isinstance(request, dict) or not isinstance(request.get('text'), str):
+            raise HttpError(400, "Expected a JSON object with a 'text' string")
+        src, dests = parse_languages(request.get('src'), request.get('dest', 'en'))
+        text = request['text']
+
+        key = ('translate', hashlib.sha256(text.encode('utf-8')).hexdigest(), src,
+               tuple(sorted(dests)))
+        translations = await self.coalesce('/translate', key, self.translator.translate_text_many,
+                                           text, src, sorted(dests))
+        return 200, 'application/json', json.dumps({
+            'src': src,
+            'translations': {dest: translations[dest] for dest in dests},
+        }, ensure_ascii=False).encode('utf-8')
+
+    def translate_pdf_bytes(self, data, src, dest, layout, ocr):
+        from pdf_extract import page_count
+        from pdf_layout import translate_pdf_layout
+        from pipeline import translate_pdf_file
+
+        with tempfile.TemporaryDirectory() as tmp:
+            in_path = os.path.join(tmp, "input.pdf")
+            out_path = os.path.join(tmp, "output.pdf")
+            with open(in_path, 'wb') as f:
+                f.write(data)
+            # Unreadable uploads are the client's error; the parser's message
+            # would also reveal the temporary path
+            try:
+                page_count(in_path, 'fitz' if layout else None)
+            except ImportError:
+                raise
+            except Exception:
+                raise HttpError(400, "Invalid PDF")
+            # The journal is keyed by the file's digest, so a repeated upload
+            # of a document that failed half-way resumes where it stopped
+            if layout:
+                translate_pdf_layout(in_path, {dest: out_path}, self.translator, src,
+                                     journal=self.journal)
+            else:
+                translate_pdf_file(in_path, {dest: out_path}, self.translator, src,
+                                   journal=self.journal, ocr=ocr)
+            with open(out_path, 'rb') as f:
+                return f.read()
+
+    async def translate_pdf(self, query, body):
+        if not body.startswith(b"%PDF"):
+            raise HttpError(400, "Expected a PDF request body")
+        params = parse_qs(query)
+        src, dests = parse_languages(params.get('src', ['ar'])[0], params.get('dest', ['en'])[0])
+        layout = params.get('layout', ['0'])[0] in ('1', 'true', 'yes')
+        ocr = params.get('ocr', ['0'])[0] in ('1', 'true', 'yes')
+
+        key = ('translate_pdf', hashlib.sha256(body).hexdigest(), src, dests[0], layout, ocr)
+        pdf = await self.coalesce('/translate_pdf', key, self.translate_pdf_bytes,
+                                  body, src, dests[0], layout, ocr)
+        return 200, 'application/pdf', pdf
+
+    async def dispatch(self, method, path, query, body):
+        routes = {
+            '/translate': ('POST', lambda: self.translate(body)),
+            '/translate_pdf': ('POST', lambda: self.translate_pdf(query, body)),
+            '/metrics': ('GET', self.render_metrics),
+            '/health': ('GET', self.health),
+        }
+        if path not in routes:
+            raise HttpError(404, f"Unknown path: {path}")
+        allowed, handler = routes[path]
+        if method != allowed:
+            raise HttpError(405, f"{path} only accepts {allowed}")
+        return await handler()
+
+    async def render_metrics(self):
+        text = self.metrics.render(self.backend, self.translator.cache)
+        return 200, 'text/plain; version=0.0.4', text.encode('utf-8')
+
+    async def health(self):
+        return 200, 'application/json', b'{"status": "ok"}'
+
+    async def read_request(self, reader):
+        # Returns (method, target, headers, body) or None at end of stream
+        line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HttpError(411, "Chunked request bodies are not supported")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        limit = MAX_PDF_BODY if target.startswith('/translate_pdf') else MAX_TEXT_BODY
+        if length > limit:
+            raise HttpError(413, f"Request body larger than {limit} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                start = time.perf_counter()
+                endpoint = None
+                keep_alive = False
+                try:
+                    request = await self.read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    url = urlsplit(target)
+                    endpoint = url.path
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    self.metrics.in_flight += 1
+                    try:
+                        status, content_type, payload = await self.dispatch(method, url.path,
+                                                                             url.query, body)
+                    finally:
+                        self.metrics.in_flight -= 1
+                except HttpError as e:
+                    status, content_type = e.status, 'application/json'
+                    payload = json.dumps({'error': str(e)}).encode('utf-8')
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except Exception:
+                    # Details (which may include local paths) go to the server log only
+                    traceback.print_exc(file=sys.stderr)
+                    status, content_type = 500, 'application/json'
+                    payload = json.dumps({'error': "Internal server error"}).encode('utf-8')
+
+                if endpoint in ('/translate', '/translate_pdf', '/metrics', '/health'):
+                    self.metrics.observe(endpoint, status, time.perf_counter() - start)
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if ready:
+            ready(server.sockets[0].getsockname())
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
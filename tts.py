@@ -0,0 +1,149 @@
+# Chunked text to speech
+#
+# Long texts are split into sentence chunks that are synthesized
+# concurrently, so playback can start as soon as the first chunk is ready
+# while later chunks are still being produced. Chunks are stored in the
+# audio cache, so chunks that were synthesized before are ready at once.
+# gTTS writes plain MP3 frame streams, so the chunk files can be
+# concatenated byte for byte into a single MP3 without synthesizing the
+# text again.
+#
+# The engine is picked with ARABIC_TRANSLATION_TTS: 'gtts' (default) or
+# 'stub', which writes deterministic placeholder bytes without network
+# access, for offline runs and benchmarks.
+
+import hashlib
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_cache import AudioCache
+from instrumentation import span
+from segmenter import segment_text
+
+CHUNK_CHARS = 300
+MIN_CHUNK_CHARS = 60
+MAX_WORKERS = 4
+ENGINES = ['gtts', 'stub']
+# Roughly the size of gTTS output per character of text
+STUB_BYTES_PER_CHAR = 400
+
+
+def default_engine():
+    return os.environ.get('ARABIC_TRANSLATION_TTS', 'gtts')
+
+
+def split_chunks(text, max_chars=CHUNK_CHARS, min_chars=MIN_CHUNK_CHARS):
+    return [segment.text for segment in segment_text(text, max_chars, min_chars)]
+
+
+def synthesize(text, lang, path, engine=None):
+    with span('tts.synthesize', chars=len(text)):
+        synthesize_engine(text, lang, path, engine or default_engine())
+
+
+def synthesize_engine(text, lang, path, engine):
+    if engine == 'stub':
+        block = hashlib.sha256(f"{lang}\0{text}".encode('utf-8')).digest()
+        with open(path, 'wb') as f:
+            f.write(block * (len(text) * STUB_BYTES_PER_CHAR // len(block) + 1))
+        return
+    if engine != 'gtts':
+        raise ValueError(f"Unknown TTS engine: {engine}")
+    from gtts import gTTS
+    gTTS(text=text, lang=lang).save(path)
+
+
+class Speech:
+    def __init__(self, text, lang, cache=None, max_chars=CHUNK_CHARS, engine=None):
+        self.text = text
+        self.lang = lang
+        self.engine = engine or default_engine()
+        self.cache = cache if cache is not None else AudioCache()
+        self.chunks = split_chunks(text, max_chars)
+        self.paths = [self.cache.get(chunk, lang, self.engine) for chunk in self.chunks]
+        self.futures = {}  # chunk index -> future of its synthesis, while running
+        self.lock = threading.Lock()
+
+    def synthesize_chunk(self, i):
+        temp_path = self.cache.temp_path()
+        try:
+            synthesize(self.chunks[i], self.lang, temp_path, self.engine)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return self.cache.put_file(self.chunks[i], self.lang, self.engine, temp_path)
+
+    def ready_path(self, i):
+        # Path of chunk i once it has been synthesized, None before that
+        with self.lock:
+            return self.paths[i] if i < len(self.paths) else None
+
+    def complete(self):
+        with self.lock:
+            return all(path is not None for path in self.paths)
+
+    def chunk_done(self, i, future):
+        # Keeps the chunk even if the caller that submitted it has stopped
+        with self.lock:
+            if self.futures.get(i) is future:
+                del self.futures[i]
+            if not future.cancelled() and future.exception() is None:
+                self.paths[i] = future.result()
+
+    def synthesize(self, max_workers=MAX_WORKERS, progress=None):
+        # Synthesizes the missing chunks concurrently. Chunks are submitted in
+        # order so the first ones finish first; progress(done, total) is called
+        # after each chunk and may raise to stop early. Several callers (e.g.
+        # Read Text, then Save MP3) share the chunks in flight: a chunk being
+        # synthesized for one of them is waited for, not submitted again, and
+        # only resubmitted if the other caller stopped before it started
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                futures = {}
+                submitted = []
+                with self.lock:
+                    # Chunks finished by another caller meanwhile are not redone
+                    pending = [i for i, path in enumerate(self.paths) if path is None]
+                    done = len(self.paths) - len(pending)
+                    if not pending:
+                        break
+                    for i in pending:
+                        future = self.futures.get(i)
+                        if future is None or future.cancelled():
+                            future = self.futures[i] = executor.submit(self.synthesize_chunk, i)
+                            submitted.append((i, future))
+                        futures[future] = i
+                # Outside the lock: callbacks of finished futures run right away.
+                # as_completed() is not used because it is never woken up for
+                # futures cancelled by another caller's executor shutdown
+                finished = queue.Queue()
+                for i, future in submitted:
+                    future.add_done_callback(lambda future, i=i: self.chunk_done(i, future))
+                for future in futures:
+                    future.add_done_callback(finished.put)
+                for _ in futures:
+                    future = finished.get()
+                    if future.cancelled():
+                        continue
+                    i = futures[future]
+                    path = future.result()
+                    with self.lock:
+                        self.paths[i] = path
+                    done += 1
+                    if progress:
+                        progress(done, len(self.paths))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def save(self, path):
+        # Concatenates the synthesized chunks into one MP3 file
+        if not self.complete():
+            raise RuntimeError("Speech has not been fully synthesized")
+        with open(path, 'wb') as output:
+            for chunk_path in self.paths:
+                with open(chunk_path, 'rb') as chunk:
+                    shutil.copyfileobj(chunk, output)